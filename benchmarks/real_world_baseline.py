@@ -5,9 +5,22 @@ Simulates actual user data processing
 import time
 
 
+def _busy(us: float) -> None:
+    """
+    Spin for `us` microseconds
+
+    Stands in for I/O with the same call-tree shape as time.sleep(), but
+    without the OS scheduler's timer granularity, so baseline timings are
+    reproducible when comparing profiler overhead.
+    """
+    deadline = time.perf_counter() + us * 1e-6
+    while time.perf_counter() < deadline:
+        pass
+
+
 def fetch_user_from_db(user_id: int) -> dict:
     """Simulate fetching user from database"""
-    time.sleep(0.001)  # 1ms per query
+    _busy(1000)  # 1ms per query
     return {
         'id': user_id,
         'name': f'User{user_id}',
@@ -35,7 +48,7 @@ def send_notifications(results: dict) -> int:
     """Send notifications to users"""
     count = 0
     for user_data in results.values():
-        time.sleep(0.0005)  # 0.5ms per notification
+        _busy(500)  # 0.5ms per notification
         count += 1
     return count
 
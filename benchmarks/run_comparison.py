@@ -8,27 +8,39 @@ import time
 from pathlib import Path
 
 
-def run_command(cmd: list, description: str) -> tuple[float, str]:
-    """Run a command and return (elapsed_time, output)"""
+def run_command(cmd: list, description: str, capture: bool = True) -> tuple[float, str]:
+    """
+    Run a command and return (elapsed_time, output)
+
+    Output is read as raw bytes and decoded after the timer stops, so only
+    the process lifetime is measured. Pass capture=False to discard output
+    entirely when it isn't inspected.
+    """
     print(f"\n{'='*70}")
     print(f"Running: {description}")
     print(f"Command: {' '.join(cmd)}")
     print('='*70)
 
+    stream = subprocess.PIPE if capture else subprocess.DEVNULL
+
     start = time.perf_counter()
-    result = subprocess.run(
+    proc = subprocess.Popen(
         cmd,
-        capture_output=True,
-        text=True,
+        stdout=stream,
+        stderr=stream,
         cwd=Path(__file__).parent.parent
     )
+    stdout, stderr = proc.communicate()
     elapsed = time.perf_counter() - start
 
-    print(result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
+    stdout = stdout.decode(errors='replace') if stdout else ''
+    stderr = stderr.decode(errors='replace') if stderr else ''
+
+    print(stdout)
+    if stderr:
+        print("STDERR:", stderr)
 
-    return elapsed, result.stdout
+    return elapsed, stdout
 
 
 def main():
@@ -52,7 +64,7 @@ def main():
         py_spy_exe, "record", "-o", "NUL", "-d", "30",
         "--", sys.executable, "benchmarks/benchmark_workload.py"
     ]
-    elapsed, output = run_command(cmd, "py-spy (Rust)")
+    elapsed, output = run_command(cmd, "py-spy (Rust)", capture=False)
     results["py-spy"] = elapsed
 
     # Print summary
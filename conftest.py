@@ -0,0 +1,12 @@
+"""
+pytest configuration: make the in-tree package importable
+
+The single sys.path bootstrap for the test suite; not needed when
+pyprofiler is installed (pip install -e .).
+"""
+import sys
+from pathlib import Path
+
+src_path = Path(__file__).parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
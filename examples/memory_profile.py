@@ -13,18 +13,13 @@ from pyprofiler import MemoryProfiler
 
 def allocate_memory():
     """Allocate some memory"""
-    data = []
-    for i in range(1000):
-        data.append([0] * 100)
-    return data
+    return [[0] * 100 for _ in range(1000)]
 
 
 def allocate_strings():
     """Allocate string data"""
-    strings = []
-    for i in range(100):
-        strings.append("x" * 1000)
-    return strings
+    # "x" * 1000 is constant-folded, so every slot refers to the same string
+    return ["x" * 1000] * 100
 
 
 def main():
@@ -3,8 +3,18 @@ Real-world profiling example - Finding performance bottlenecks
 
 This demonstrates the actual use case for a profiler:
 finding which functions are slow and need optimization.
+
+Set FUSE=1 to fetch and process each user in a single pass instead of
+building the intermediate list of fetched users first.
+
+The simulated database queries and notifications are I/O bound, so they
+run on a thread pool. Only the decorated pipeline stages are profiled;
+the worker threads themselves are not traced.
 """
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Use installed package
@@ -15,8 +25,11 @@ except ImportError:
     sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
     from profiler import CPUProfiler
 
+# Worker threads for the simulated I/O calls
+MAX_WORKERS = 16
+
 
-def process_user_data(user_ids: list) -> dict:
+def process_all_users_loop(user_ids: list) -> dict:
     """Simulate processing user data - this is the slow part"""
     results = {}
 
@@ -35,7 +48,6 @@ def process_user_data(user_ids: list) -> dict:
 def fetch_user_from_db(user_id: int) -> dict:
     """Simulate fetching user from database"""
     # Simulate slow database query
-    import time
     time.sleep(0.001)  # 1ms per query
 
     return {
@@ -62,15 +74,17 @@ def calculate_analytics(results: dict) -> dict:
     return analytics
 
 
+def send_notification(user_data: dict) -> bool:
+    """Send a notification to one user"""
+    # Simulate API call
+    time.sleep(0.0005)  # 0.5ms per notification
+    return True
+
+
 def send_notifications(results: dict) -> int:
     """Send notifications to users"""
-    count = 0
-    for user_data in results.values():
-        # Simulate API call
-        import time
-        time.sleep(0.0005)  # 0.5ms per notification
-        count += 1
-    return count
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return sum(executor.map(send_notification, results.values()))
 
 
 def main():
@@ -88,19 +102,25 @@ def main():
     @profiler.profile_function
     def fetch_all_users(user_ids):
         """Fetch all users from database"""
-        return [fetch_user_from_db(uid) for uid in user_ids]
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return list(executor.map(fetch_user_from_db, user_ids))
 
     @profiler.profile_function
     def process_all_users(user_data_list):
         """Process all user data"""
         return {ud['id']: process_user_data(ud) for ud in user_data_list}
 
+    @profiler.profile_function
+    def fetch_and_process_users(user_ids):
+        """Fetch and process each user in one pass (no intermediate list)"""
+        return {uid: process_user_data(fetch_user_from_db(uid)) for uid in user_ids}
+
     @profiler.profile_function
     def calc_analytics(results):
         """Calculate analytics"""
         return calculate_analytics(results)
 
-    @profiler_profile_function
+    @profiler.profile_function
     def notify_users(results):
         """Send notifications"""
         return send_notifications(results)
@@ -111,8 +131,11 @@ def main():
     # Run the application
     user_ids = list(range(100))
 
-    user_data_list = fetch_all_users(user_ids)
-    results = process_all_users(user_data_list)
+    if os.environ.get('FUSE') == '1':
+        results = fetch_and_process_users(user_ids)
+    else:
+        user_data_list = fetch_all_users(user_ids)
+        results = process_all_users(user_data_list)
     analytics = calc_analytics(results)
     notifications_sent = notify_users(results)
 
@@ -143,11 +166,5 @@ def main():
         print(f"      → Optimization target: caching, batching, or async")
 
 
-# For typing
-def profiler_profile_function(func):
-    """Temporary workaround - will be fixed in proper implementation"""
-    return func
-
-
 if __name__ == "__main__":
     main()
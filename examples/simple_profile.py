@@ -20,10 +20,16 @@ def fibonacci(n: int) -> int:
 
 
 def heavy_computation():
-    """Simulate heavy computation"""
+    """
+    Simulate heavy computation
+
+    The loop is kept (rather than returning 4950 * 1000) so the function
+    still does measurable work; only the loop-invariant sum is hoisted.
+    """
+    row_sum = sum(range(100))
     result = 0
-    for i in range(1000):
-        result += sum(range(100))
+    for _ in range(1000):
+        result += row_sum
     return result
 
 
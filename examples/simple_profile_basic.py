@@ -1,5 +1,5 @@
 """
-Simple profiling example - fixed imports
+Basic profiling example - decorators and print_stats() only
 """
 import sys
 from pathlib import Path
@@ -8,7 +8,7 @@ from pathlib import Path
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
-from profiler import CPUProfiler
+from pyprofiler import CPUProfiler
 
 
 def fibonacci(n: int) -> int:
@@ -19,10 +19,16 @@ def fibonacci(n: int) -> int:
 
 
 def heavy_computation():
-    """Simulate heavy computation"""
+    """
+    Simulate heavy computation
+
+    The loop is kept (rather than returning 4950 * 1000) so the function
+    still does measurable work; only the loop-invariant sum is hoisted.
+    """
+    row_sum = sum(range(100))
     result = 0
-    for i in range(1000):
-        result += sum(range(100))
+    for _ in range(1000):
+        result += row_sum
     return result
 
 
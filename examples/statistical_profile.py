@@ -0,0 +1,153 @@
+"""
+Statistical (sampling) profiling example
+
+Instead of hooking every call, a background thread looks at the profiled
+thread's stack every `interval` seconds via sys._current_frames(). The
+overhead depends on the sample rate, not on how many calls the code makes,
+so the recursive fibonacci below costs the same to profile as a flat loop.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add src to path
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from pyprofiler import ProfilerStats, FunctionStats
+from pyprofiler.reporters.console import ConsoleReporter
+
+
+class StatisticalProfiler:
+    """
+    Sampling profiler based on sys._current_frames()
+
+    Each sample adds one hit to the innermost function (own time) and one
+    hit to every distinct function on the stack (total time).
+    """
+
+    def __init__(self, interval: float = 0.001):
+        """
+        Initialize statistical profiler
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._own_samples = Counter()
+        self._total_samples = Counter()
+        self._sample_count = 0
+        self._target_thread = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._start_time = 0.0
+        self._elapsed = 0.0
+        self._old_switch_interval = None
+
+    def start(self) -> None:
+        """Start sampling the calling thread"""
+        self._target_thread = threading.get_ident()
+        self._stop_event.clear()
+        # The sampler needs the GIL to run; by default a busy thread only
+        # releases it every 5ms, which would cap the sample rate
+        self._old_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._old_switch_interval, self.interval))
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._old_switch_interval is not None:
+            sys.setswitchinterval(self._old_switch_interval)
+            self._old_switch_interval = None
+        self._elapsed = time.perf_counter() - self._start_time
+
+    def _sample_loop(self):
+        """Background thread that records stack samples"""
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+
+            self._sample_count += 1
+            self._own_samples[frame.f_code] += 1
+
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                if code not in seen:
+                    seen.add(code)
+                    self._total_samples[code] += 1
+                frame = frame.f_back
+
+    def get_stats(self):
+        """
+        Convert samples to ProfilerStats
+
+        Times are estimated from each function's share of the samples.
+        call_count holds the number of samples the function appeared in,
+        since a sampler cannot count calls.
+        """
+        if not self._sample_count:
+            return None
+
+        function_stats = {}
+        for code, hits in self._total_samples.items():
+            share = hits / self._sample_count
+            total = share * self._elapsed
+            function_stats[code.co_name] = FunctionStats(
+                name=code.co_name,
+                call_count=hits,
+                total_time=total,
+                avg_time=total / hits,
+                own_time=self._own_samples[code] / self._sample_count * self._elapsed,
+                percentage=share * 100
+            )
+
+        return ProfilerStats(total_time=self._elapsed, function_stats=function_stats)
+
+
+def fibonacci(n: int) -> int:
+    """Calculate fibonacci number (recursive, inefficient)"""
+    if n <= 1:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def heavy_computation():
+    """Simulate heavy computation"""
+    result = 0
+    for i in range(1000):
+        result += sum(range(100))
+    return result
+
+
+def main():
+    """Main function"""
+    print("Starting statistical profiling example...\n")
+
+    profiler = StatisticalProfiler(interval=0.001)
+    profiler.start()
+
+    for _ in range(20):
+        heavy_computation()
+    fibonacci(22)
+
+    profiler.stop()
+
+    stats = profiler.get_stats()
+    if stats:
+        ConsoleReporter(top_n=10, sort_by='own').report(stats)
+    else:
+        print("No samples collected")
+
+
+if __name__ == "__main__":
+    main()
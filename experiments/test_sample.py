@@ -1,7 +1,17 @@
 """
 Sample script for testing profiler
 This simulates a real workload without profiler decorators
+
+Set FIB_CACHE=1 to use the memoized fibonacci (O(n) calls) instead of the
+plain recursive one, e.g. for quick smoke tests.
 """
+import os
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def fibonacci(n):
@@ -11,8 +21,18 @@ def fibonacci(n):
     return fibonacci(n - 1) + fibonacci(n - 2)
 
 
+@lru_cache(maxsize=None)
+def fibonacci_cached(n):
+    """Calculate fibonacci number recursively with memoization"""
+    if n <= 1:
+        return n
+    return fibonacci_cached(n - 1) + fibonacci_cached(n - 2)
+
+
 def process_data():
     """Process some data"""
+    if np is not None:
+        return int((np.arange(1000, dtype=np.int64) ** 2).sum())
     result = []
     for i in range(1000):
         result.append(i ** 2)
@@ -21,6 +41,8 @@ def process_data():
 
 def calculate_stats():
     """Calculate some statistics"""
+    if np is not None:
+        return float(np.arange(10000).mean())
     data = list(range(10000))
     return sum(data) / len(data)
 
@@ -34,7 +56,8 @@ def main():
         process_data()
 
     # Fibonacci calculation
-    fib_result = fibonacci(20)
+    fib = fibonacci_cached if os.environ.get('FIB_CACHE') == '1' else fibonacci
+    fib_result = fib(20)
 
     # Stats calculation
     stats = calculate_stats()
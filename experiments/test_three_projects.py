@@ -10,6 +10,9 @@
 
 import sys
 import os
+import itertools
+import time
+import random
 from pathlib import Path
 
 # プロファイラーのパスを追加
@@ -26,36 +29,37 @@ def simulate_workflow_engine():
     print("=" * 60)
 
     # DAG操作のシミュレーション
-    import time
-    import random
-
     def validate_dag():
         """DAGバリデーション"""
+        r = random.getrandbits
         time.sleep(0.01)  # 擬似的な処理時間
         # 循環依存チェック
         for _ in range(100):
-            _ = hash(random.random())
+            r(64)
 
     def parse_workflow():
         """ワークフローパース"""
+        r = random.getrandbits
         time.sleep(0.005)
         # YAMLパースのシミュレーション
         for _ in range(50):
-            _ = hash(random.random())
+            r(64)
 
     def schedule_tasks():
         """タスクスケジューリング"""
+        r = random.getrandbits
         time.sleep(0.008)
         # 依存関係解決のシミュレーション
         for _ in range(200):
-            _ = hash(random.random())
+            r(64)
 
     def execute_task():
         """タスク実行"""
+        r = random.getrandbits
         time.sleep(0.02)
         # タスク実行のシミュレーション
         for _ in range(500):
-            _ = hash(random.random())
+            r(64)
 
     # プロファイラーで計測
     profiler = CPUProfiler()
@@ -82,38 +86,34 @@ def simulate_load_balancer():
     print("Project 2: Load Balancer Simulation")
     print("=" * 60)
 
-    import time
-    import random
-
     def round_robin_selection(servers):
         """ラウンドロビン方式のサーバー選択"""
         time.sleep(0.001)
         idx = random.randint(0, len(servers) - 1)
         return servers[idx]
 
-    def weighted_selection(servers, weights):
+    def weighted_selection(servers, cum_weights):
         """重み付けサーバー選択"""
         time.sleep(0.002)
-        # 重み計算のシミュレーション
-        total_weight = sum(weights)
-        for _ in range(100):
-            _ = hash(random.random() * total_weight)
-        return random.choice(servers)
+        # 累積重みを二分探索して選択
+        return random.choices(servers, cum_weights=cum_weights, k=1)[0]
 
     def health_check(server):
         """ヘルスチェック"""
+        r = random.getrandbits
         time.sleep(0.005)
         # ヘルスチェック処理のシミュレーション
         for _ in range(200):
-            _ = hash(random.random())
+            r(64)
         return True
 
     def route_request(request):
         """リクエストルーティング"""
+        r = random.getrandbits
         time.sleep(0.003)
         # ルーティング処理のシミュレーション
         for _ in range(150):
-            _ = hash(random.random())
+            r(64)
         return "routed"
 
     # プロファイラーで計測
@@ -122,12 +122,13 @@ def simulate_load_balancer():
 
     servers = ["server1", "server2", "server3", "server4"]
     weights = [1, 2, 3, 4]
+    cum_weights = list(itertools.accumulate(weights))
 
     # 負荷分散処理シミュレーション
     for _ in range(100):
         server = round_robin_selection(servers)
         health_check(server)
-        weighted_selection(servers, weights)
+        weighted_selection(servers, cum_weights)
         route_request(f"request_{_}")
 
     profiler.stop()
@@ -144,40 +145,41 @@ def simulate_task_scheduler():
     print("Project 3: Task Scheduler Simulation")
     print("=" * 60)
 
-    import time
-    import random
-
     def parse_cron_expression(cron_expr):
         """cron式のパース"""
+        r = random.getrandbits
         time.sleep(0.002)
         # cronパースのシミュレーション
         parts = cron_expr.split()
         for _ in range(50):
-            _ = hash(random.random())
+            r(64)
         return parts
 
     def check_dependencies(task, tasks):
         """タスク依存関係チェック"""
+        r = random.getrandbits
         time.sleep(0.005)
         # 依存関係解決のシミュレーション
         for _ in range(300):
-            _ = hash(random.random())
+            r(64)
         return True
 
     def execute_task(task):
         """タスク実行"""
+        r = random.getrandbits
         time.sleep(0.015)
         # タスク実行のシミュレーション
         for _ in range(400):
-            _ = hash(random.random())
+            r(64)
         return True
 
     def update_task_history(task, status):
         """タスク履歴更新"""
+        r = random.getrandbits
         time.sleep(0.003)
         # 履歴更新のシミュレーション
         for _ in range(100):
-            _ = hash(random.random())
+            r(64)
 
     # プロファイラーで計測
     profiler = CPUProfiler()
@@ -23,7 +23,8 @@ concat_strings(strings)
 join_strings(strings)
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("Test 16: String Concatenation - AFTER (use join only)")
@@ -40,4 +41,5 @@ for _ in range(2):  # Run twice to match original workload
     join_strings_optimized(strings)
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
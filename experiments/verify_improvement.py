@@ -28,7 +28,8 @@ for _ in range(5):
     filter_method(1000)
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("AFTER: Using list comprehension (fast)")
@@ -43,4 +44,5 @@ for _ in range(5):
     list_comp_method(1000)
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
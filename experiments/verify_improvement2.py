@@ -30,7 +30,8 @@ for _ in range(10):
     multiply_matrices(mat1, mat2)
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("Test 3: Matrix Operations - AFTER (using list comprehension)")
@@ -53,4 +54,5 @@ for _ in range(10):
     multiply_matrices_optimized(mat1, mat2)
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
@@ -32,7 +32,8 @@ build_lookup(data)
 find_duplicates(data)
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("Test 4: Dictionary Operations - AFTER (optimized)")
@@ -59,4 +60,28 @@ build_lookup_optimized(data)
 find_duplicates_optimized(data)
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
+
+print("\n" + "=" * 80)
+print("Test 4: Dictionary Operations - AFTER (comprehension + bound set.add)")
+print("=" * 80)
+
+code_comprehension = '''
+def find_duplicates_c_loop(items):
+    seen = set()
+    seen_add = seen.add
+    return [item for item in items
+            if item['name'] in seen or seen_add(item['name'])]
+
+def build_lookup_optimized(data):
+    return {item['id']: item for item in data}
+
+# Create sample data and process
+data = [{'id': i, 'name': f'item_{i % 100}'} for i in range(1000)]
+build_lookup_optimized(data)
+find_duplicates_c_loop(data)
+'''
+
+co_comprehension = compile(code_comprehension, '<comprehension>', 'exec')
+pyprofiler.run_code(co_comprehension)
@@ -22,7 +22,8 @@ for _ in range(10):
     bubble_sort(data.copy())
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("Test 7: Sorting - AFTER (using built-in sort - fast)")
@@ -38,4 +39,5 @@ for _ in range(10):
     builtin_sort(data.copy())
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
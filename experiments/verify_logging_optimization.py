@@ -37,7 +37,8 @@ for i in range(10):
     logger.log_warning(f'Warning message {i}')
 '''
 
-pyprofiler.run(code_before)
+co_before = compile(code_before, '<before>', 'exec')
+pyprofiler.run_code(co_before)
 
 print("\n" + "=" * 80)
 print("Test 17: Logging - AFTER (with level filtering)")
@@ -76,4 +77,5 @@ for i in range(10):
     logger.log_warning(f'Warning message {i}')
 '''
 
-pyprofiler.run(code_after)
+co_after = compile(code_after, '<after>', 'exec')
+pyprofiler.run_code(co_after)
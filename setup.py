@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
@@ -13,6 +13,15 @@ setup(
     url="https://github.com/yourusername/pyprofiler",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    # C profile hook for pyprofiler.run(); optional so that installs without
+    # a compiler fall back to the pure-Python hook
+    ext_modules=[
+        Extension(
+            "pyprofiler._ctracer",
+            sources=["src/pyprofiler/_ctracer.c"],
+            optional=True,
+        ),
+    ],
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -1,10 +1,22 @@
 """
 pyprofiler - Python profiler for CPU and memory profiling
 """
-from .profiler import Profiler, CPUProfiler, profile_function
+import sys
+import threading
+import time
+from array import array
+
+from .profiler import Profiler, CPUProfiler, profile_function, _geometric_skipper
 from .memory_profiler import MemoryProfiler
 from .models import ProfilerStats, FunctionStats
 
+try:
+    from . import _ctracer
+except ImportError:
+    # C hook not built (no compiler at install time); run() falls back to
+    # the pure-Python profile hook
+    _ctracer = None
+
 __version__ = "0.2.0"
 
 __all__ = [
@@ -15,11 +27,344 @@ __all__ = [
     'ProfilerStats',
     'FunctionStats',
     'run',
+    'run_code',
     'runctx',
 ]
 
 
-def run(statement, filename=None, sort=-1, output=None, sampling_rate=1.0):
+# Code objects run() never reports: private names, comprehension/module
+# bodies, and anything under these path fragments
+_SKIP_NAMES = frozenset({'<module>', '<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>'})
+_SKIP_SUBSTRINGS = ('pyprofiler', 'site-packages', 'lib/python')
+
+
+def _path_skip(filename, skip_substrings=_SKIP_SUBSTRINGS):
+    """Return True if code from filename should be ignored by the Python hooks"""
+    normalized_path = filename.replace('\\', '/')
+    return any(part in normalized_path for part in skip_substrings)
+
+
+def _ctracer_thread_hook(frame, event, arg):
+    """threading.setprofile() hook that replaces itself with the C hook"""
+    _ctracer.install_thread()
+
+
+def _collect_ctracer(profiler):
+    """Merge the C hook's per-code counters into profiler, keyed by name"""
+    for code, (_, times) in _ctracer.drain().items():
+        if times:
+            profiler._add_times(code.co_name, array('d', times))
+
+
+class _CodeTable:
+    """
+    Struct-of-arrays counters for the pure-Python profile hooks
+
+    Each code object gets a slot the first time it is seen, so an event
+    costs one dict lookup (id(code) -> slot) followed by array indexing.
+    Code objects the hooks skip map to slot -1. The table keeps every code
+    object it has seen alive, so an id can't be reused by another one.
+    """
+
+    def __init__(self, skip_names=_SKIP_NAMES, skip_substrings=_SKIP_SUBSTRINGS):
+        self.skip_names = skip_names
+        self.skip_substrings = skip_substrings
+        self.slots = {}             # id(code) -> slot, or -1 if skipped
+        self.codes = []             # Strong references to the keys of slots
+        self.path_skip = {}         # co_filename -> _path_skip() result
+        self.meta = []              # slot -> (co_name, co_filename, co_firstlineno)
+        self.start_ns = array('q')  # slot -> start of the call in flight, -1 if none
+        self.samples = []           # slot -> array('q') of elapsed nanoseconds
+
+    def add(self, code):
+        """Assign a slot to code and return it (-1 if the hooks skip it)"""
+        func_name = code.co_name
+        if func_name.startswith('_') or func_name in self.skip_names:
+            skip = True
+        else:
+            # Most code objects share a handful of files, so the path
+            # substring scan runs once per file
+            filename = code.co_filename
+            skip = self.path_skip.get(filename)
+            if skip is None:
+                skip = self.path_skip[filename] = _path_skip(filename, self.skip_substrings)
+
+        if skip:
+            slot = -1
+        else:
+            slot = len(self.meta)
+            self.meta.append((func_name, code.co_filename, code.co_firstlineno))
+            self.start_ns.append(-1)
+            self.samples.append(array('q'))
+        self.codes.append(code)
+        self.slots[id(code)] = slot
+        return slot
+
+    def merge_into(self, profiler):
+        """Add the counters to profiler, keyed by name, with times in seconds"""
+        for slot, (func_name, _, _) in enumerate(self.meta):
+            profiler._add_times(func_name, self.samples[slot], 1e-9)
+
+
+# Source for the pure-Python profile hook. _make_hook() fills in the
+# sampling branch (or leaves it out entirely for sampling_rate >= 1.0), so
+# the common full-profile case carries no per-event sampling test.
+_HOOK_TEMPLATE = """
+def make_hook(table, now, next_skip):
+    slots = table.slots
+    add = table.add
+    start_ns = table.start_ns
+    samples = table.samples
+    skip_remaining = next_skip() if next_skip is not None else 0
+
+    def profile_hook(frame, event, arg):
+        nonlocal skip_remaining
+        slot = slots.get(id(frame.f_code))
+        if slot is None:
+            slot = add(frame.f_code)
+        if slot < 0:
+            return
+
+        if event == 'call':
+{sampling_branch}
+            start_ns[slot] = now()
+
+        elif event == 'return':
+            start = start_ns[slot]
+            if start >= 0:
+                samples[slot].append(now() - start)
+                start_ns[slot] = -1
+
+    return profile_hook
+"""
+
+_SAMPLING_BRANCH = """\
+            skip_remaining -= 1
+            if skip_remaining > 0:
+                return
+            skip_remaining = next_skip()
+"""
+
+_hook_factories = {}
+
+# (skip_names, skip_substrings) of the last sys.monitoring install
+_monitoring_rules = None
+
+
+def _make_hook(table, now, next_skip):
+    """
+    Create a sys.setprofile() hook recording into table
+
+    Args:
+        table: _CodeTable the hook records into
+        now: Clock returning integer nanoseconds
+        next_skip: Sampler from _geometric_skipper(), or None to profile every call
+
+    Returns:
+        Profile hook function
+    """
+    sampled = next_skip is not None
+    factory = _hook_factories.get(sampled)
+    if factory is None:
+        source = _HOOK_TEMPLATE.replace(
+            '{sampling_branch}\n', _SAMPLING_BRANCH if sampled else '')
+        namespace = {}
+        exec(compile(source, '<pyprofiler hook>', 'exec'), namespace)
+        factory = _hook_factories[sampled] = namespace['make_hook']
+    return factory(table, now, next_skip)
+
+
+def _install_monitoring(table, now, next_skip, threads):
+    """
+    Record into table through sys.monitoring (PEP 669, Python 3.12+)
+
+    Events are dispatched from C, and a callback returning DISABLE turns
+    that event off for the code object, so skipped functions cost nothing
+    after their first call. Unlike sys.setprofile() events arrive from
+    every thread, so only those from the threads in threads are recorded.
+
+    Args:
+        table: _CodeTable to record into
+        now: Clock returning integer nanoseconds
+        next_skip: Sampler from _geometric_skipper(), or None to profile every call
+        threads: Set of thread idents to record; threads started later can
+            be added to it while installed
+
+    Returns:
+        True if installed, False if sys.monitoring is unavailable or the
+        profiler tool id is already in use (e.g. by cProfile)
+    """
+    monitoring = getattr(sys, 'monitoring', None)
+    if monitoring is None:
+        return False
+    tool_id = monitoring.PROFILER_ID
+    try:
+        monitoring.use_tool_id(tool_id, 'pyprofiler')
+    except ValueError:
+        return False
+
+    DISABLE = monitoring.DISABLE
+    slots = table.slots
+    add = table.add
+    start_ns = table.start_ns
+    samples = table.samples
+    skip_remaining = next_skip() if next_skip is not None else 0
+    get_ident = threading.get_ident
+
+    def on_start(code, instruction_offset):
+        nonlocal skip_remaining
+        slot = slots.get(id(code))
+        if slot is None:
+            slot = add(code)
+        if slot < 0:
+            return DISABLE
+        if get_ident() not in threads:
+            return
+
+        # Sampling: only profile fraction of calls
+        if next_skip is not None:
+            skip_remaining -= 1
+            if skip_remaining > 0:
+                return
+            skip_remaining = next_skip()
+
+        start_ns[slot] = now()
+
+    def on_return(code, instruction_offset, retval):
+        slot = slots.get(id(code))
+        if slot is None:
+            slot = add(code)
+        if slot < 0:
+            return DISABLE
+        if get_ident() not in threads:
+            return
+
+        start = start_ns[slot]
+        if start >= 0:
+            samples[slot].append(now() - start)
+            start_ns[slot] = -1
+
+    def on_unwind(code, instruction_offset, exception):
+        # PY_UNWIND is a global event: it can't return DISABLE
+        slot = slots.get(id(code), -1)
+        if slot >= 0 and get_ident() in threads:
+            start = start_ns[slot]
+            if start >= 0:
+                samples[slot].append(now() - start)
+                start_ns[slot] = -1
+
+    # Same events sys.setprofile() reports as 'call'/'return': generator
+    # resumption counts as a call, yield as a return
+    events = monitoring.events
+    monitoring.register_callback(tool_id, events.PY_START, on_start)
+    monitoring.register_callback(tool_id, events.PY_RESUME, on_start)
+    monitoring.register_callback(tool_id, events.PY_RETURN, on_return)
+    monitoring.register_callback(tool_id, events.PY_YIELD, on_return)
+    monitoring.register_callback(tool_id, events.PY_UNWIND, on_unwind)
+    # DISABLEd sites outlive the tool id, and restart_events() re-enables
+    # them for every tool: only call it if a previous install skipped
+    # code under different rules
+    global _monitoring_rules
+    rules = (table.skip_names, table.skip_substrings)
+    if _monitoring_rules is not None and _monitoring_rules != rules:
+        monitoring.restart_events()
+    _monitoring_rules = rules
+    monitoring.set_events(
+        tool_id,
+        events.PY_START | events.PY_RESUME | events.PY_RETURN | events.PY_YIELD | events.PY_UNWIND
+    )
+    return True
+
+
+def _monitoring_thread_hook(threads):
+    """
+    Create a threading.setprofile() hook that adds new threads to threads
+
+    The hook removes itself on the new thread's first event, so the
+    thread is then only seen by sys.monitoring.
+    """
+    def register(frame, event, arg):
+        sys.setprofile(None)
+        threads.add(threading.get_ident())
+
+    return register
+
+
+def _uninstall_monitoring():
+    """Undo _install_monitoring() and release the profiler tool id"""
+    monitoring = sys.monitoring
+    tool_id = monitoring.PROFILER_ID
+    events = monitoring.events
+    monitoring.set_events(tool_id, 0)
+    for event in (events.PY_START, events.PY_RESUME, events.PY_RETURN,
+                  events.PY_YIELD, events.PY_UNWIND):
+        monitoring.register_callback(tool_id, event, None)
+    monitoring.free_tool_id(tool_id)
+
+
+def _install_hook(profiler, sampling_rate=1.0, trace_threads=True,
+                  skip_names=_SKIP_NAMES, skip_substrings=_SKIP_SUBSTRINGS):
+    """
+    Install the fastest available profile hook, recording into profiler
+
+    Tries the C hook, then sys.monitoring (Python 3.12+), then a
+    pure-Python sys.setprofile() hook. run(), runctx() and the CLI all go
+    through here.
+
+    Args:
+        profiler: CPUProfiler that receives the results
+        sampling_rate: Fraction of calls to profile (0.0-1.0)
+        trace_threads: Also profile threads started while running
+        skip_names: Function names never reported
+        skip_substrings: Path fragments whose code is never reported
+
+    Returns:
+        Function that removes the hook and merges its counters into profiler
+    """
+    if _ctracer is not None:
+        _ctracer.install(skip_substrings, skip_names, sampling_rate)
+        if trace_threads:
+            threading.setprofile(_ctracer_thread_hook)
+
+        def uninstall():
+            sys.setprofile(None)
+            threading.setprofile(None)
+            _collect_ctracer(profiler)
+
+        return uninstall
+
+    # Integer nanoseconds in the hook; converted to seconds when merged
+    table = _CodeTable(skip_names, skip_substrings)
+    next_skip = _geometric_skipper(sampling_rate)
+
+    # sys.monitoring sees every thread: record this one and, like the
+    # other hooks, only the threads started while installed
+    threads = {threading.get_ident()}
+    if _install_monitoring(table, time.perf_counter_ns, next_skip, threads):
+        if trace_threads:
+            threading.setprofile(_monitoring_thread_hook(threads))
+
+        def uninstall():
+            threading.setprofile(None)
+            _uninstall_monitoring()
+            table.merge_into(profiler)
+
+        return uninstall
+
+    profile_hook = _make_hook(table, time.perf_counter_ns, next_skip)
+    sys.setprofile(profile_hook)
+    if trace_threads:
+        threading.setprofile(profile_hook)
+
+    def uninstall():
+        sys.setprofile(None)
+        threading.setprofile(None)
+        table.merge_into(profiler)
+
+    return uninstall
+
+
+def run(statement, filename=None, sort=-1, output=None, sampling_rate=1.0, trace_threads=True):
     """
     Run a statement under profiler profiling (cProfile compatible)
 
@@ -32,6 +377,8 @@ def run(statement, filename=None, sort=-1, output=None, sampling_rate=1.0):
         sort: Sort key for results (default: -1 for cumulative time)
         output: Output file object (default: sys.stdout)
         sampling_rate: Fraction of calls to profile (0.0-1.0). 1.0 = profile all (default)
+        trace_threads: Also profile threads started while running (default: True).
+            False profiles only the calling thread
 
     Returns:
         ProfilerStats object with profiling results
@@ -42,68 +389,45 @@ def run(statement, filename=None, sort=-1, output=None, sampling_rate=1.0):
         >>> pyprofiler.run('import math; math.factorial(10000)')
         >>> pyprofiler.run('my_function()', sampling_rate=0.1)  # Profile 10% of calls
     """
-    import sys
-    import threading
-
-    if output is None:
-        output = sys.stdout
+    # Compile before the hook goes in so compilation isn't profiled
+    code = compile(statement, filename or '<profiler>', 'exec')
+    return run_code(code, sort=sort, output=output, sampling_rate=sampling_rate,
+                    trace_threads=trace_threads)
 
-    profiler = CPUProfiler(sampling_rate=sampling_rate)
-
-    # Track call start times for accurate measurement
-    profiler._call_start_times = {}
 
-    # Sampling support
-    import random
-    import _thread
-
-    def profile_hook(frame, event, arg):
-        """Profile hook for sys.setprofile()"""
-        func_name = frame.f_code.co_name
-        filename_local = frame.f_code.co_filename
-
-        # Fast-path: skip private/special functions first (no string operations)
-        if func_name.startswith('_'):
-            return
-        if func_name in ('<module>', '<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>'):
-            return
+def run_code(code, sort=-1, output=None, sampling_rate=1.0, trace_threads=True):
+    """
+    Run a pre-compiled code object under profiler profiling
 
-        # Normalize path once for filename checks
-        normalized_path = filename_local.replace('\\', '/')
+    Same as run(), but takes the result of compile() so that repeated
+    runs of the same source skip parsing and compilation.
 
-        # Skip profiler internals and Python internals
-        if 'pyprofiler' in normalized_path:
-            return
-        if 'site-packages' in normalized_path:
-            return
-        if 'lib/python' in normalized_path:
-            return
+    Args:
+        code: Code object from compile(source, filename, 'exec')
+        sort: Sort key for results (default: -1 for cumulative time)
+        output: Output file object (default: sys.stdout)
+        sampling_rate: Fraction of calls to profile (0.0-1.0). 1.0 = profile all (default)
+        trace_threads: Also profile threads started while running (default: True)
 
-        # Sampling: only profile fraction of calls
-        if event == 'call' and random.random() > sampling_rate:
-            return
+    Returns:
+        ProfilerStats object with profiling results
 
-        if event == 'call':
-            profiler._call_counts[func_name] += 1
-            profiler._call_start_times[func_name] = profiler._timer.get_time()
+    Examples:
+        >>> import pyprofiler
+        >>> code = compile('my_function()', '<profiler>', 'exec')
+        >>> pyprofiler.run_code(code)
+    """
+    if output is None:
+        output = sys.stdout
 
-        elif event == 'return':
-            start_time = profiler._call_start_times.pop(func_name, None)
-            if start_time is not None:
-                elapsed = profiler._timer.get_time() - start_time
-                if func_name not in profiler._function_times:
-                    profiler._function_times[func_name] = []
-                profiler._function_times[func_name].append(elapsed)
+    profiler = CPUProfiler(sampling_rate=sampling_rate)
 
     profiler.start()
-    sys.setprofile(profile_hook)
-    threading.setprofile(profile_hook)
-
+    uninstall = _install_hook(profiler, sampling_rate, trace_threads)
     try:
-        exec(statement, globals())
+        exec(code, globals())
     finally:
-        sys.setprofile(None)
-        threading.setprofile(None)
+        uninstall()
         profiler.stop()
 
     # Print and return stats
@@ -129,26 +453,19 @@ def runctx(statement, globals, locals, filename=None, sort=-1, output=None):
     Returns:
         ProfilerStats object with profiling results
     """
-    import sys
-
     if output is None:
         output = sys.stdout
 
-    profiler = CPUProfiler()
-    profiler.start()
+    code = compile(statement, filename or '<profiler>', 'exec')
 
-    # Use sys.setprofile for automatic tracing
-    def profile_hook(frame, event, arg):
-        if event == 'call':
-            func_name = frame.f_code.co_name
-            profiler._call_counts[func_name] += 1
-
-    sys.setprofile(profile_hook)
+    profiler = CPUProfiler()
 
+    profiler.start()
+    uninstall = _install_hook(profiler)
     try:
-        exec(statement, globals, locals)
+        exec(code, globals, locals)
     finally:
-        sys.setprofile(None)
+        uninstall()
         profiler.stop()
 
     stats = profiler.get_stats()
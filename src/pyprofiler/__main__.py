@@ -8,12 +8,24 @@ Usage:
 """
 import sys
 import os
-import argparse
-from pathlib import Path
-from datetime import datetime
+
+
+# Skip lists the CLI passes to _install_hook(). Frozensets
+# so name membership is a hash lookup rather than a list scan
+_SPECIAL_NAMES = frozenset({'<module>', '<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>'})
+_IMPORT_NAMES = frozenset({
+    'exec_module', 'get_code', 'compile', 'get_data', 'parse',
+    'find_spec', 'create_module', 'module_from_spec', 'get',
+    'acquire', 'cache_from_source',
+})
+_SKIP_NAMES = _SPECIAL_NAMES | _IMPORT_NAMES
+_SKIP_SUBSTRINGS = ('pyprofiler', 'site-packages', 'lib/python', '_bootstrap', '_imp')
 
 
 def main():
+    # Imported here so importing pyprofiler.__main__ stays cheap
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Profile Python code',
         usage='python -m pyprofiler [-o output_file] [--no-auto-save] script.py [args]'
@@ -51,24 +63,11 @@ def main():
     args = parser.parse_args()
 
     # Check if script exists
-    script_path = Path(args.script)
-    if not script_path.exists():
+    script_path = args.script
+    if not os.path.exists(script_path):
         print(f"Error: Script '{args.script}' not found", file=sys.stderr)
         sys.exit(1)
 
-    # Read the script
-    with open(script_path, 'r', encoding='utf-8') as f:
-        script_code = f.read()
-
-    # Prepare the execution context
-    script_globals = {
-        '__name__': '__main__',
-        '__file__': str(script_path.absolute()),
-        '__package__': None,
-        '__cached__': None,
-        '__builtins__': __builtins__,
-    }
-
     # Update sys.argv for the script
     old_argv = sys.argv
     sys.argv = [args.script] + args.script_args
@@ -76,7 +75,7 @@ def main():
     try:
         # Import and run profiler
         import runpy
-        from . import CPUProfiler
+        from . import CPUProfiler, _install_hook
 
         print(f"Profiling {args.script}...")
         print("=" * 60)
@@ -84,53 +83,17 @@ def main():
         # Set up profiling hook
         profiler = CPUProfiler()
 
-        def profile_hook_with_timing(frame, event, arg):
-            """Profile hook that tracks call times"""
-            func_name = frame.f_code.co_name
-            filename_local = frame.f_code.co_filename
-
-            # Skip profiler internals and Python internals
-            skip_conditions = [
-                'pyprofiler' in filename_local,
-                'site-packages' in filename_local,
-                'lib/python' in filename_local.replace('\\', '/'),
-                func_name.startswith('_'),
-                func_name in ['<module>', '<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>'],
-                # Import-related functions
-                func_name in ['exec_module', 'get_code', 'compile', 'get_data', 'parse',
-                             'find_spec', 'create_module', 'module_from_spec', 'get',
-                             'acquire', 'cache_from_source'],
-                # Internal modules
-                '_bootstrap' in filename_local,
-                '_imp' in filename_local,
-            ]
-
-            if any(skip_conditions):
-                return
-
-            if event == 'call':
-                profiler._call_counts[func_name] = profiler._call_counts.get(func_name, 0) + 1
-                profiler._call_start_times[func_name] = profiler._timer.get_time()
-            elif event == 'return':
-                start_time = profiler._call_start_times.pop(func_name, None)
-                if start_time is not None:
-                    elapsed = profiler._timer.get_time() - start_time
-                    if func_name not in profiler._function_times:
-                        profiler._function_times[func_name] = []
-                    profiler._function_times[func_name].append(elapsed)
-
-        # Initialize call start times tracking
-        profiler._call_start_times = {}
-
-        # Install profiling hook before running script
-        sys.setprofile(profile_hook_with_timing)
+        # Install profiling hook before running script, skipping profiler
+        # internals and Python internals
+        uninstall = _install_hook(profiler, trace_threads=False,
+                                  skip_names=_SKIP_NAMES, skip_substrings=_SKIP_SUBSTRINGS)
         profiler.start()
 
         try:
             # Run the script using runpy (this supports relative imports)
             runpy.run_path(args.script, run_name='__main__')
         finally:
-            sys.setprofile(None)
+            uninstall()
             profiler.stop()
 
         # Print results
@@ -140,6 +103,7 @@ def main():
         # Auto-save statistics (unless --no-auto-save is specified)
         if not args.no_auto_save:
             import pickle
+            from datetime import datetime
 
             # Determine output filename
             if args.outfile:
@@ -147,7 +111,7 @@ def main():
             else:
                 # Auto-generate filename with timestamp
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                script_name = script_path.stem
+                script_name = os.path.splitext(os.path.basename(script_path))[0]
                 outfile = f"profile_{script_name}_{timestamp}.stats"
 
             # Save statistics
@@ -158,25 +122,29 @@ def main():
 
             # Also save a human-readable text report
             txt_report = outfile.replace('.stats', '.txt')
+            # Build the report in memory and write it once
+            lines = []
+            lines.append(f"Profiling Report: {args.script}")
+            lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            lines.append(f"Total Time: {stats.total_time:.4f}s")
+            lines.append(f"Functions Profiled: {len(stats.function_stats)}")
+            lines.append("=" * 80 + "\n")
+
+            # Top functions
+            lines.append(f"{'Function':<30} {'Calls':<10} {'Total(s)':<12} {'Own(s)':<12} {'%'}")
+            lines.append("-" * 80)
+
+            for func_stats in stats.get_top_functions(20):
+                lines.append(
+                    f"{func_stats.name:<30} "
+                    f"{func_stats.call_count:<10} "
+                    f"{func_stats.total_time:<12.6f} "
+                    f"{func_stats.own_time:<12.6f} "
+                    f"{func_stats.percentage:>6.1f}%"
+                )
+
             with open(txt_report, 'w', encoding='utf-8') as f:
-                f.write(f"Profiling Report: {args.script}\n")
-                f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total Time: {stats.total_time:.4f}s\n")
-                f.write(f"Functions Profiled: {len(stats.function_stats)}\n")
-                f.write("=" * 80 + "\n\n")
-
-                # Write top functions
-                f.write(f"{'Function':<30} {'Calls':<10} {'Total(s)':<12} {'Own(s)':<12} {'%'}\n")
-                f.write("-" * 80 + "\n")
-
-                for func_stats in stats.get_top_functions(20):
-                    f.write(
-                        f"{func_stats.name:<30} "
-                        f"{func_stats.call_count:<10} "
-                        f"{func_stats.total_time:<12.6f} "
-                        f"{func_stats.own_time:<12.6f} "
-                        f"{func_stats.percentage:>6.1f}%\n"
-                    )
+                f.write('\n'.join(lines) + '\n')
 
             print(f"[*] Text report saved to {txt_report}")
 
@@ -0,0 +1,399 @@
+/*
+ * C implementation of the sys.setprofile() hook used by pyprofiler.run()
+ *
+ * The pure-Python hook pays for bytecode dispatch, string checks and dict
+ * lookups on every call/return event. This module installs a C profile
+ * function with PyEval_SetProfile() and keeps per-code-object counters in
+ * an open-addressing table keyed by the PyCodeObject pointer. The skip
+ * decision (private names, special names, profiler/stdlib paths) is made
+ * once per code object on first sighting.
+ *
+ * API:
+ *     install(skip_substrings, skip_names, sampling_rate)
+ *     install_thread()
+ *     drain() -> {code: (call_count, elapsed_bytes)}
+ *
+ * elapsed_bytes holds native doubles (seconds), ready for array('d').frombytes().
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <frameobject.h>
+#include <stdint.h>
+#include <math.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <time.h>
+#endif
+
+typedef struct {
+    PyObject *code;     /* strong reference; NULL marks an empty slot */
+    int skip;
+    int active;         /* a sampled call is waiting for its return */
+    Py_ssize_t calls;
+    int64_t start_ns;
+    double *times;      /* elapsed seconds, grown on demand */
+    Py_ssize_t n_times;
+    Py_ssize_t cap_times;
+} entry_t;
+
+static entry_t *table = NULL;
+static Py_ssize_t table_size = 0;   /* always a power of two */
+static Py_ssize_t table_used = 0;
+
+static PyObject *skip_substrings = NULL;    /* tuple of str */
+static PyObject *skip_names = NULL;         /* frozenset of str */
+static double sampling_rate = 1.0;
+static uint64_t rng_state = 0x9E3779B97F4A7C15ULL;
+static int64_t skip_remaining = 0;         /* calls left until the next sample */
+
+
+static int64_t
+now_ns(void)
+{
+#ifdef _WIN32
+    static LARGE_INTEGER freq = {0};
+    LARGE_INTEGER counter;
+    if (freq.QuadPart == 0) {
+        QueryPerformanceFrequency(&freq);
+    }
+    QueryPerformanceCounter(&counter);
+    return (int64_t)((double)counter.QuadPart * 1e9 / (double)freq.QuadPart);
+#else
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (int64_t)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+#endif
+}
+
+
+/* xorshift64* -> uniform double in [0, 1) */
+static double
+next_random(void)
+{
+    rng_state ^= rng_state >> 12;
+    rng_state ^= rng_state << 25;
+    rng_state ^= rng_state >> 27;
+    return (double)((rng_state * 2685821657736338717ULL) >> 11)
+           * (1.0 / 9007199254740992.0);
+}
+
+
+/* Calls until the next sampled one: geometric with p = sampling_rate */
+static int64_t
+next_skip(void)
+{
+    double draws;
+    if (sampling_rate <= 0.0) {
+        return INT64_MAX;
+    }
+    draws = log(1.0 - next_random()) / log1p(-sampling_rate);
+    if (draws >= 9.0e18) {
+        return INT64_MAX;
+    }
+    return (int64_t)draws + 1;
+}
+
+
+static Py_ssize_t
+slot_index(PyObject *code, Py_ssize_t mask)
+{
+    uintptr_t h = (uintptr_t)code >> 4;
+    h *= (uintptr_t)0x9E3779B97F4A7C15ULL;
+    return (Py_ssize_t)(h & (uintptr_t)mask);
+}
+
+
+static void
+table_clear(void)
+{
+    Py_ssize_t i;
+    for (i = 0; i < table_size; i++) {
+        Py_CLEAR(table[i].code);
+        PyMem_Free(table[i].times);
+    }
+    if (table_size) {
+        memset(table, 0, sizeof(entry_t) * (size_t)table_size);
+    }
+    table_used = 0;
+}
+
+
+static int
+table_resize(Py_ssize_t new_size)
+{
+    entry_t *old = table;
+    Py_ssize_t old_size = table_size;
+    Py_ssize_t i;
+
+    table = (entry_t *)PyMem_Calloc((size_t)new_size, sizeof(entry_t));
+    if (table == NULL) {
+        table = old;
+        PyErr_NoMemory();
+        return -1;
+    }
+    table_size = new_size;
+
+    for (i = 0; i < old_size; i++) {
+        if (old[i].code != NULL) {
+            Py_ssize_t j = slot_index(old[i].code, new_size - 1);
+            while (table[j].code != NULL) {
+                j = (j + 1) & (new_size - 1);
+            }
+            table[j] = old[i];
+        }
+    }
+    PyMem_Free(old);
+    return 0;
+}
+
+
+/* Return 1 to skip this code object, 0 to profile it, -1 on error */
+static int
+compute_skip(PyObject *code)
+{
+    PyObject *name = NULL, *filename = NULL, *normalized = NULL;
+    int result = -1;
+    Py_ssize_t i;
+
+    name = PyObject_GetAttrString(code, "co_name");
+    if (name == NULL) {
+        goto done;
+    }
+    if (PyUnicode_GET_LENGTH(name) > 0 && PyUnicode_READ_CHAR(name, 0) == '_') {
+        result = 1;
+        goto done;
+    }
+    result = PySet_Contains(skip_names, name);
+    if (result != 0) {
+        goto done;
+    }
+
+    result = -1;
+    filename = PyObject_GetAttrString(code, "co_filename");
+    if (filename == NULL) {
+        goto done;
+    }
+    {
+        PyObject *backslash = PyUnicode_FromString("\\");
+        PyObject *slash = PyUnicode_FromString("/");
+        if (backslash != NULL && slash != NULL) {
+            normalized = PyUnicode_Replace(filename, backslash, slash, -1);
+        }
+        Py_XDECREF(backslash);
+        Py_XDECREF(slash);
+    }
+    if (normalized == NULL) {
+        goto done;
+    }
+
+    result = 0;
+    for (i = 0; i < PyTuple_GET_SIZE(skip_substrings); i++) {
+        int found = PyUnicode_Contains(normalized, PyTuple_GET_ITEM(skip_substrings, i));
+        if (found != 0) {
+            result = found;
+            break;
+        }
+    }
+
+done:
+    Py_XDECREF(name);
+    Py_XDECREF(filename);
+    Py_XDECREF(normalized);
+    return result;
+}
+
+
+static entry_t *
+lookup(PyObject *code)
+{
+    Py_ssize_t i;
+    int skip;
+
+    if ((table_used + 1) * 2 > table_size) {
+        if (table_resize(table_size ? table_size * 2 : 256) < 0) {
+            return NULL;
+        }
+    }
+
+    i = slot_index(code, table_size - 1);
+    while (table[i].code != NULL) {
+        if (table[i].code == code) {
+            return &table[i];
+        }
+        i = (i + 1) & (table_size - 1);
+    }
+
+    skip = compute_skip(code);
+    if (skip < 0) {
+        return NULL;
+    }
+    Py_INCREF(code);
+    table[i].code = code;
+    table[i].skip = skip;
+    table[i].active = 0;
+    table[i].calls = 0;
+    table[i].start_ns = 0;
+    table[i].times = NULL;
+    table[i].n_times = 0;
+    table[i].cap_times = 0;
+    table_used++;
+    return &table[i];
+}
+
+
+static int
+tracer(PyObject *obj, PyFrameObject *frame, int what, PyObject *arg)
+{
+    PyObject *code;
+    entry_t *e;
+
+    if (what != PyTrace_CALL && what != PyTrace_RETURN) {
+        return 0;
+    }
+
+#if PY_VERSION_HEX >= 0x030900B1
+    code = (PyObject *)PyFrame_GetCode(frame);
+#else
+    code = (PyObject *)frame->f_code;
+    Py_INCREF(code);
+#endif
+    e = lookup(code);
+    Py_DECREF(code);
+    if (e == NULL) {
+        return -1;
+    }
+    if (e->skip) {
+        return 0;
+    }
+
+    if (what == PyTrace_CALL) {
+        if (sampling_rate < 1.0) {
+            if (--skip_remaining > 0) {
+                return 0;
+            }
+            skip_remaining = next_skip();
+        }
+        e->calls++;
+        e->active = 1;
+        e->start_ns = now_ns();
+    }
+    else if (e->active) {
+        double elapsed = (double)(now_ns() - e->start_ns) * 1e-9;
+        e->active = 0;
+        if (e->n_times == e->cap_times) {
+            Py_ssize_t new_cap = e->cap_times ? e->cap_times * 2 : 16;
+            double *grown = PyMem_Realloc(e->times, (size_t)new_cap * sizeof(double));
+            if (grown == NULL) {
+                PyErr_NoMemory();
+                return -1;
+            }
+            e->times = grown;
+            e->cap_times = new_cap;
+        }
+        e->times[e->n_times++] = elapsed;
+    }
+    return 0;
+}
+
+
+static PyObject *
+ctracer_install(PyObject *self, PyObject *args)
+{
+    PyObject *substrings, *names;
+    double rate;
+    PyObject *new_substrings, *new_names;
+
+    if (!PyArg_ParseTuple(args, "OOd:install", &substrings, &names, &rate)) {
+        return NULL;
+    }
+    new_substrings = PySequence_Tuple(substrings);
+    if (new_substrings == NULL) {
+        return NULL;
+    }
+    new_names = PyFrozenSet_New(names);
+    if (new_names == NULL) {
+        Py_DECREF(new_substrings);
+        return NULL;
+    }
+
+    Py_XSETREF(skip_substrings, new_substrings);
+    Py_XSETREF(skip_names, new_names);
+    sampling_rate = rate;
+    skip_remaining = rate < 1.0 ? next_skip() : 0;
+    table_clear();
+
+    PyEval_SetProfile(tracer, NULL);
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *
+ctracer_install_thread(PyObject *self, PyObject *unused)
+{
+    if (skip_substrings == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "install() must be called first");
+        return NULL;
+    }
+    PyEval_SetProfile(tracer, NULL);
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *
+ctracer_drain(PyObject *self, PyObject *unused)
+{
+    PyObject *result = PyDict_New();
+    Py_ssize_t i;
+
+    if (result == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < table_size; i++) {
+        entry_t *e = &table[i];
+        PyObject *value;
+        if (e->code == NULL || e->skip || e->calls == 0) {
+            continue;
+        }
+        value = Py_BuildValue("(ny#)", e->calls, (const char *)e->times,
+                              e->n_times * (Py_ssize_t)sizeof(double));
+        if (value == NULL || PyDict_SetItem(result, e->code, value) < 0) {
+            Py_XDECREF(value);
+            Py_DECREF(result);
+            return NULL;
+        }
+        Py_DECREF(value);
+    }
+    table_clear();
+    return result;
+}
+
+
+static PyMethodDef ctracer_methods[] = {
+    {"install", ctracer_install, METH_VARARGS,
+     "install(skip_substrings, skip_names, sampling_rate)\n\n"
+     "Reset the counters and install the C profile hook on this thread."},
+    {"install_thread", ctracer_install_thread, METH_NOARGS,
+     "Install the C profile hook on the calling thread."},
+    {"drain", ctracer_drain, METH_NOARGS,
+     "Return {code: (call_count, elapsed_bytes)} and reset the counters.\n\n"
+     "elapsed_bytes holds native doubles for array('d').frombytes()."},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static struct PyModuleDef ctracer_module = {
+    PyModuleDef_HEAD_INIT,
+    "_ctracer",
+    "C profile hook for pyprofiler.run()",
+    -1,
+    ctracer_methods
+};
+
+
+PyMODINIT_FUNC
+PyInit__ctracer(void)
+{
+    return PyModule_Create(&ctracer_module);
+}
@@ -3,11 +3,84 @@ Memory profiler for tracking memory usage
 
 Uses tracemalloc to automatically track memory allocations.
 """
+import os
 import sys
 import gc
+import heapq
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, Any, List, Tuple, Optional
-from collections import defaultdict
+from collections import Counter, deque
 import tracemalloc
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+_SNAPSHOT_FILTERS = (
+    # Only this package's own files: user code that merely lives under a
+    # directory named pyprofiler (e.g. a clone of this repo) is kept
+    tracemalloc.Filter(False, os.path.join(os.path.dirname(os.path.abspath(__file__)), '*')),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+
+
+def _leak_kernel(prev_hashes, prev_sizes, curr_hashes, curr_sizes, threshold):
+    """
+    Join two snapshots on traceback hash and find grown allocations
+
+    Args:
+        prev_hashes, prev_sizes: int64 arrays for the previous snapshot
+        curr_hashes, curr_sizes: int64 arrays for the current snapshot
+        threshold: Minimum growth in bytes
+
+    Returns:
+        (indices into the current arrays, growth per current entry)
+    """
+    order = np.argsort(prev_hashes)
+    sorted_hashes = prev_hashes[order]
+    sorted_sizes = prev_sizes[order]
+    pos = np.minimum(np.searchsorted(sorted_hashes, curr_hashes), len(sorted_hashes) - 1)
+    matched = sorted_hashes[pos] == curr_hashes
+    growth = curr_sizes - sorted_sizes[pos]
+    return np.nonzero(matched & (growth > threshold))[0], growth
+
+
+def _leak_loop(prev_hashes, prev_sizes, curr_hashes, curr_sizes, threshold):
+    """
+    Loop form of _leak_kernel for Numba
+
+    Compiled, one pass over the current entries does the join, growth
+    and threshold test without _leak_kernel's temporary arrays.
+    """
+    order = np.argsort(prev_hashes)
+    sorted_hashes = prev_hashes[order]
+    sorted_sizes = prev_sizes[order]
+    n = len(sorted_hashes)
+    indices = np.empty(len(curr_hashes), np.int64)
+    growth = np.zeros(len(curr_hashes), np.int64)
+    found = 0
+    for i in range(len(curr_hashes)):
+        pos = np.searchsorted(sorted_hashes, curr_hashes[i])
+        if pos < n and sorted_hashes[pos] == curr_hashes[i]:
+            growth[i] = curr_sizes[i] - sorted_sizes[pos]
+            if growth[i] > threshold:
+                indices[found] = i
+                found += 1
+    return indices[:found], growth
+
+
+if njit is not None:
+    # Cached on disk so each process doesn't pay the compile again
+    _leak_kernel = njit(cache=True)(_leak_loop)
 
 
 class MemoryProfiler:
@@ -23,17 +96,51 @@ class MemoryProfiler:
     - Per-function memory usage tracking
     """
 
-    def __init__(self):
-        self._snapshots = []
+    def __init__(self, census_objects: bool = False, freeze_gc: bool = False, nframes: int = 1):
+        """
+        Initialize memory profiler
+
+        Args:
+            census_objects: On stop(), scan the gc heap once and report live
+                objects by their real type instead of inferring types from
+                allocation tracebacks
+            freeze_gc: If True, gc.freeze() the pre-existing heap while profiling
+                so automatic collections only scan objects created during the run.
+                Costs a full gc.collect() in start(), so only worth it for long runs
+            nframes: Traceback depth stored per allocation. Leak locations and
+                type inference only need the innermost frame; deeper tracebacks
+                give more context but grow snapshots and statistics() cost
+                linearly
+        """
+        # (start, end) snapshots of the last two sessions only: get_stats()
+        # needs the latest pair and detect_leaks() the previous end, so
+        # older snapshots are dropped instead of accumulating
+        self._snapshots = deque(maxlen=2)
         self._is_running = False
         self._start_snapshot = None
-        self._object_stats = defaultdict(lambda: {'count': 0, 'size': 0})
-        self._function_memory = defaultdict(lambda: {'allocated': 0, 'freed': 0})
+        self._census_objects = census_objects
+        self._freeze_gc = freeze_gc
+        self._nframes = max(1, nframes)
+        self._froze_gc = False
+        # {type_name: {'count': n, 'size': bytes}} from the latest census
+        self._object_stats = {}
+        # get_stats() result for the latest session (cleared by stop())
+        self._stats_cache = None
+        # Snapshot.statistics() regroups every trace on each call; snapshots
+        # are immutable, so memoize per (snapshot, key_type). Cleared by
+        # stop() so it never keeps snapshots the deque has dropped alive
+        self._statistics = lru_cache(maxsize=4)(tracemalloc.Snapshot.statistics)
 
     def start(self) -> None:
         """Start memory profiling"""
         if not self._is_running:
-            tracemalloc.start()
+            # Skipped if someone else already froze objects, so we don't
+            # unfreeze theirs in stop()
+            if self._freeze_gc and gc.get_freeze_count() == 0:
+                gc.collect()
+                gc.freeze()
+                self._froze_gc = True
+            tracemalloc.start(self._nframes)
             self._start_snapshot = tracemalloc.take_snapshot()
             self._is_running = True
 
@@ -41,32 +148,100 @@ class MemoryProfiler:
         """Stop memory profiling"""
         if self._is_running:
             snapshot = tracemalloc.take_snapshot()
+            if self._snapshots:
+                # Only the previous session's end snapshot is still needed
+                self._snapshots[-1] = (None, self._snapshots[-1][1])
             self._snapshots.append((self._start_snapshot, snapshot))
+            self._start_snapshot = None
+            self._statistics.cache_clear()
             tracemalloc.stop()
+            if self._froze_gc:
+                self._froze_gc = False
+                gc.unfreeze()
+            if self._census_objects:
+                self._object_stats = self._object_census()
             self._is_running = False
-
-    def profile_object_types(self) -> Dict[str, Dict[str, int]]:
+            self._stats_cache = None
+
+    @staticmethod
+    def _object_census() -> Dict[str, Dict[str, int]]:
+        """Count and size live gc-tracked objects by type in a single heap scan"""
+        counts = Counter()
+        sizes = Counter()
+        getsizeof = sys.getsizeof
+        for obj in gc.get_objects():
+            name = type(obj).__name__
+            counts[name] += 1
+            sizes[name] += getsizeof(obj, 0)
+        return {name: {'count': count, 'size': sizes[name]}
+                for name, count in counts.items()}
+
+    def profile_object_types(self, traceback_stats: Optional[List[Any]] = None) -> Dict[str, Dict[str, int]]:
         """
         Get memory statistics by object type
 
+        Uses the heap census when census_objects is enabled, otherwise
+        infers types from the latest snapshot's allocation tracebacks.
+
+        Args:
+            traceback_stats: Precomputed 'traceback' statistics of the latest
+                snapshot (computed if omitted)
+
         Returns:
             Dictionary mapping object types to their count and total size
         """
         if not self._snapshots:
             return {}
-
-        _, end_snapshot = self._snapshots[-1]
-        stats_by_type = defaultdict(lambda: {'count': 0, 'size': 0})
-
-        for stat in end_snapshot.statistics('traceback'):
+        if self._object_stats:
+            return dict(self._object_stats)
+
+        if traceback_stats is None:
+            traceback_stats = self._statistics(self._snapshots[-1][1], 'traceback')
+        # Intern object types to small ids and record one (type id, size)
+        # pair per traceback frame; the type only depends on the filename
+        type_names = []
+        type_ids = {}
+        file_type_ids = {}
+        ids = array('q')
+        sizes = array('q')
+
+        for stat in traceback_stats:
+            size = stat.size
             # Get object type from traceback
             for trace in stat.traceback:
-                obj_type = self._get_object_type_from_trace(trace)
-                if obj_type:
-                    stats_by_type[obj_type]['count'] += 1
-                    stats_by_type[obj_type]['size'] += stat.size
+                tid = file_type_ids.get(trace.filename)
+                if tid is None:
+                    obj_type = self._get_object_type_from_trace(trace)
+                    if obj_type:
+                        tid = type_ids.get(obj_type)
+                        if tid is None:
+                            tid = type_ids[obj_type] = len(type_names)
+                            type_names.append(obj_type)
+                    else:
+                        tid = -1
+                    file_type_ids[trace.filename] = tid
+                if tid >= 0:
+                    ids.append(tid)
+                    sizes.append(size)
+
+        if not ids:
+            return {}
 
-        return dict(stats_by_type)
+        n = len(type_names)
+        if np is not None:
+            id_arr = np.frombuffer(ids, dtype=np.int64)
+            counts = np.bincount(id_arr, minlength=n).tolist()
+            totals = np.bincount(id_arr, weights=np.frombuffer(sizes, dtype=np.int64),
+                                 minlength=n).astype(np.int64).tolist()
+        else:
+            counts = [0] * n
+            totals = [0] * n
+            for tid, size in zip(ids, sizes):
+                counts[tid] += 1
+                totals[tid] += size
+
+        return {obj_type: {'count': counts[tid], 'size': totals[tid]}
+                for tid, obj_type in enumerate(type_names)}
 
     def _get_object_type_from_trace(self, trace) -> Optional[str]:
         """Try to infer object type from traceback"""
@@ -80,76 +255,130 @@ class MemoryProfiler:
             return 'set'
         return 'unknown'
 
-    def detect_leaks(self, threshold: int = 1024) -> List[Dict[str, Any]]:
+    def detect_leaks(self, threshold: int = 1024, top_n: Optional[int] = None,
+                     traceback_stats: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         Detect potential memory leaks
 
         Args:
             threshold: Minimum size in bytes to consider as a leak
+            top_n: Only return the top_n largest leaks (default: all)
+            traceback_stats: Precomputed 'traceback' statistics of the latest
+                snapshot (computed if omitted)
 
         Returns:
-            List of potential memory leaks with details
+            List of potential memory leaks with details, largest growth first
         """
         if len(self._snapshots) < 2:
             return []
 
-        leaks = []
         prev_snapshot = self._snapshots[-2][1]
         curr_snapshot = self._snapshots[-1][1]
 
-        # Compare snapshots to find growing allocations
-        prev_stats = {stat.traceback: stat for stat in prev_snapshot.statistics('traceback')}
-        curr_stats = {stat.traceback: stat for stat in curr_snapshot.statistics('traceback')}
-
-        for traceback, curr_stat in curr_stats.items():
-            if traceback in prev_stats:
-                prev_stat = prev_stats[traceback]
-                growth = curr_stat.size - prev_stat.size
+        # Join the two snapshots on the traceback's hash: one pass over each
+        # side, and no frame-by-frame Traceback equality checks. A 64-bit
+        # collision between two live tracebacks is negligible here.
+        prev_stats = self._statistics(prev_snapshot, 'traceback')
+        if traceback_stats is None:
+            traceback_stats = self._statistics(curr_snapshot, 'traceback')
+        if not prev_stats or not traceback_stats:
+            return []
 
+        if np is not None:
+            grown = self._leak_candidates_vectorized(prev_stats, traceback_stats, threshold)
+        else:
+            prev_sizes = {hash(stat.traceback): stat.size for stat in prev_stats}
+            grown = []
+            for curr_stat in traceback_stats:
+                prev_size = prev_sizes.get(hash(curr_stat.traceback))
+                if prev_size is None:
+                    continue
+                growth = curr_stat.size - prev_size
                 if growth > threshold:
-                    leaks.append({
-                        'traceback': traceback,
-                        'growth': growth,
-                        'current_size': curr_stat.size,
-                        'location': f"{curr_stat.traceback[0].filename}:{curr_stat.traceback[0].lineno}"
-                    })
+                    grown.append((curr_stat, growth))
+
+        leaks = []
+        for curr_stat, growth in grown:
+            frame = curr_stat.traceback[0]
+            leaks.append({
+                'traceback': curr_stat.traceback,
+                'growth': growth,
+                'current_size': curr_stat.size,
+                'location': f"{frame.filename}:{frame.lineno}"
+            })
 
         # Sort by growth descending
-        leaks.sort(key=lambda x: x['growth'], reverse=True)
+        if top_n is not None:
+            return heapq.nlargest(top_n, leaks, key=itemgetter('growth'))
+        leaks.sort(key=itemgetter('growth'), reverse=True)
         return leaks
 
+    @staticmethod
+    def _leak_candidates_vectorized(prev_stats, curr_stats, threshold: int) -> List[Tuple[Any, int]]:
+        """
+        Array version of the leak join (NumPy, compiled with Numba if available)
+
+        Returns:
+            List of (current statistic, growth) pairs above threshold
+        """
+        def columns(stats):
+            n = len(stats)
+            hashes = np.fromiter((hash(stat.traceback) for stat in stats), np.int64, count=n)
+            sizes = np.fromiter((stat.size for stat in stats), np.int64, count=n)
+            return hashes, sizes
+
+        prev_hashes, prev_sizes = columns(prev_stats)
+        curr_hashes, curr_sizes = columns(curr_stats)
+        indices, growth = _leak_kernel(prev_hashes, prev_sizes, curr_hashes, curr_sizes, threshold)
+        return [(curr_stats[i], int(growth[i])) for i in indices.tolist()]
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get memory statistics
 
         Returns:
             Dictionary with memory statistics
+
+        Snapshots never change once taken, so the result is cached until
+        the next session is recorded.
         """
         if not self._snapshots:
             return {}
 
+        if self._stats_cache is not None:
+            return self._stats_cache
+
         # Use the most recent profiling session
         start_snapshot, end_snapshot = self._snapshots[-1]
 
-        # Calculate total memory growth
-        start_stats = start_snapshot.statistics('lineno')
-        end_stats = end_snapshot.statistics('lineno')
+        # Drop the profiler's own allocations (and tracemalloc's) before
+        # diffing so they don't show up in the report
+        start_snapshot = start_snapshot.filter_traces(_SNAPSHOT_FILTERS)
+        end_snapshot = end_snapshot.filter_traces(_SNAPSHOT_FILTERS)
+
+        # Per-line growth, diffed inside tracemalloc and sorted by size_diff
+        diffs = end_snapshot.compare_to(start_snapshot, 'lineno')
+        growth = sum([diff.size_diff for diff in diffs])
 
-        start_total = sum(stat.size for stat in start_stats)
-        end_total = sum(stat.size for stat in end_stats)
-        growth = end_total - start_total
+        # Totals only need per-file grouping
+        start_total = sum([stat.size for stat in start_snapshot.statistics('filename')])
+        end_total = sum([stat.size for stat in end_snapshot.statistics('filename')])
 
-        # Get top memory allocations
-        top_stats = end_stats[:10]
+        # Lines whose allocations grew the most
+        top_stats = diffs[:10]
 
-        return {
+        # Group the raw latest snapshot by traceback once for both consumers
+        traceback_stats = self._statistics(self._snapshots[-1][1], 'traceback')
+
+        self._stats_cache = {
             'initial_total': start_total,
             'final_total': end_total,
             'growth': growth,
             'top_stats': top_stats,
-            'object_types': self.profile_object_types(),
-            'leaks': self.detect_leaks()
+            'object_types': self.profile_object_types(traceback_stats),
+            'leaks': self.detect_leaks(traceback_stats=traceback_stats)
         }
+        return self._stats_cache
 
     def print_stats(self, top_n: int = 10) -> None:
         """Print memory statistics to console"""
@@ -158,30 +387,34 @@ class MemoryProfiler:
             print("No memory profiling data available")
             return
 
-        print("\nMemory Statistics:")
-        print(f"  Initial: {stats['initial_total']:,} bytes ({stats['initial_total'] / 1024:.2f} KB)")
-        print(f"  Final:   {stats['final_total']:,} bytes ({stats['final_total'] / 1024:.2f} KB)")
-        print(f"  Growth:  {stats['growth']:+,} bytes ({stats['growth'] / 1024:+.2f} KB)")
+        initial, final, growth = stats['initial_total'], stats['final_total'], stats['growth']
+        lines = [
+            "\nMemory Statistics:",
+            f"  Initial: {initial:,} bytes ({initial / 1024:.2f} KB)",
+            f"  Final:   {final:,} bytes ({final / 1024:.2f} KB)",
+            f"  Growth:  {growth:+,} bytes ({growth / 1024:+.2f} KB)",
+        ]
 
-        # Print object type breakdown
+        # Object type breakdown
         if stats['object_types']:
-            print(f"\nMemory by Object Type:")
-            for obj_type, data in sorted(stats['object_types'].items(),
-                                        key=lambda x: x[1]['size'],
-                                        reverse=True)[:top_n]:
-                print(f"  {obj_type}: {data['count']:,} objects, "
-                      f"{data['size']:,} bytes ({data['size'] / 1024:.2f} KB)")
-
-        # Print potential leaks
+            lines.append("\nMemory by Object Type:")
+            row = "  {}: {:,} objects, {:,} bytes ({:.2f} KB)".format
+            lines.extend([
+                row(obj_type, data['count'], data['size'], data['size'] / 1024)
+                for obj_type, data in heapq.nlargest(top_n, stats['object_types'].items(),
+                                                     key=lambda x: x[1]['size'])
+            ])
+
+        # Potential leaks
         if stats['leaks']:
-            print(f"\nPotential Memory Leaks (Top {min(top_n, len(stats['leaks']))}):")
-            for leak in stats['leaks'][:top_n]:
-                print(f"  +{leak['growth']:,} bytes at {leak['location']}")
-
-        print(f"\nTop {top_n} memory allocations:")
+            lines.append(f"\nPotential Memory Leaks (Top {min(top_n, len(stats['leaks']))}):")
+            lines.extend([f"  +{leak['growth']:,} bytes at {leak['location']}"
+                          for leak in stats['leaks'][:top_n]])
 
-        for stat in stats['top_stats'][:top_n]:
-            print(f"  {stat}")
+        lines.append(f"\nTop {top_n} memory allocations (growth by line):")
+        lines.extend([f"  {stat}" for stat in stats['top_stats'][:top_n]])
 
+        # One write for the whole report instead of a print() per line
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 __all__ = ['MemoryProfiler']
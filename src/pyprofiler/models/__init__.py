@@ -1,8 +1,8 @@
 """
 Data models for profiler
 """
-from .call_frame import CallFrame
+from .call_frame import CallFrame, CallFrameArena
 from .function_stats import FunctionStats
 from .profiler_stats import ProfilerStats
 
-__all__ = ['CallFrame', 'FunctionStats', 'ProfilerStats']
+__all__ = ['CallFrame', 'CallFrameArena', 'FunctionStats', 'ProfilerStats']
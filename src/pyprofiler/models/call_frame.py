@@ -1,11 +1,27 @@
 """
 Call frame data structure
 """
+import sys
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-@dataclass
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# One CallFrame is created per profiled call, so drop the per-instance
+# __dict__ where dataclass supports it (Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class CallFrame:
     """
     Represents a single function call in the call stack
@@ -14,43 +30,253 @@ class CallFrame:
         name: Function name
         filename: Source file name
         line_no: Line number in source file
-        start_time: Start timestamp (monotonic clock)
-        end_time: End timestamp (monotonic clock)
+        start_time: Start timestamp (perf_counter clock, integer nanoseconds)
+        end_time: End timestamp (perf_counter clock, integer nanoseconds)
         children: Child call frames (nested calls)
+
+    Times are kept as integer nanoseconds so short spans don't lose
+    precision; duration and own_time convert to seconds on access.
+    They are computed once by finalize() when the call returns; frames
+    built without it fall back to computing them on access.
     """
 
     name: str
     filename: str
     line_no: int
-    start_time: float
-    end_time: float
+    start_time: int
+    end_time: int
     children: List['CallFrame'] = field(default_factory=list)
+    _duration_ns: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _own_time_ns: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
+    def finalize(self, end_time: int) -> None:
+        """
+        Record the end of the call and cache duration/own_time
+
+        Children return before their parent, so their durations are
+        already cached when this runs.
+
+        Args:
+            end_time: End timestamp (perf_counter clock, integer nanoseconds)
+        """
+        self.end_time = end_time
+        self._duration_ns = duration = end_time - self.start_time
+        children_time = sum([child.duration_ns for child in self.children])
+        self._own_time_ns = max(0, duration - children_time)
 
     @property
-    def duration(self) -> float:
-        """Total execution time including children"""
+    def duration_ns(self) -> int:
+        """Total execution time including children, in nanoseconds"""
+        if self._duration_ns is not None:
+            return self._duration_ns
         return self.end_time - self.start_time
 
+    @property
+    def own_time_ns(self) -> int:
+        """Execution time excluding children (self time), in nanoseconds"""
+        if self._own_time_ns is not None:
+            return self._own_time_ns
+        children_time = sum([child.duration_ns for child in self.children])
+        return max(0, self.duration_ns - children_time)
+
+    @property
+    def duration(self) -> float:
+        """Total execution time including children, in seconds"""
+        return self.duration_ns * 1e-9
+
     @property
     def own_time(self) -> float:
-        """Execution time excluding children (self time)"""
-        children_time = sum(child.duration for child in self.children)
-        return max(0, self.duration - children_time)
+        """Execution time excluding children (self time), in seconds"""
+        return self.own_time_ns * 1e-9
 
     def add_child(self, child: 'CallFrame') -> None:
         """Add a child call frame"""
         self.children.append(child)
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary representation"""
+    def _node_dict(self) -> dict:
+        """Dictionary for this frame alone, with an empty children list"""
         return {
             'name': self.name,
             'filename': self.filename,
             'line_no': self.line_no,
             'duration': self.duration,
             'own_time': self.own_time,
-            'children': [child.to_dict() for child in self.children]
+            'children': []
         }
 
+    def to_dict(self) -> dict:
+        """
+        Convert to dictionary representation
+
+        Walks the tree with an explicit stack, so deep call trees don't hit
+        the recursion limit.
+        """
+        root = self._node_dict()
+        stack = [(self, root['children'])]
+        while stack:
+            frame, out = stack.pop()
+            for child in frame.children:
+                node = child._node_dict()
+                out.append(node)
+                if child.children:
+                    stack.append((child, node['children']))
+        return root
+
     def __repr__(self) -> str:
         return f"CallFrame(name={self.name!r}, duration={self.duration:.6f}s)"
+
+
+def _own_time_kernel(fids, start, end, child, size):
+    """
+    Sum own time per function id over the finished rows of an arena
+
+    Args:
+        fids, start, end, child: Arena columns as numpy arrays
+        size: One more than the largest function id
+
+    Returns:
+        (own nanoseconds per id as int64, whether each id has a finished row)
+    """
+    own = np.zeros(size, dtype=np.int64)
+    seen = np.zeros(size, dtype=np.bool_)
+    for i in range(len(fids)):
+        if end[i] >= 0:
+            ns = end[i] - start[i] - child[i]
+            if ns > 0:
+                own[fids[i]] += ns
+            seen[fids[i]] = True
+    return own, seen
+
+
+if njit is not None:
+    # One compiled pass with exact integer sums, instead of the mask,
+    # clip and float bincount temporaries of the numpy path
+    _own_time_kernel = njit(cache=True)(_own_time_kernel)
+
+
+class CallFrameArena:
+    """
+    Call tree stored as parallel arrays, one row per profiled call
+
+    Recording a call appends a row instead of allocating a CallFrame, so
+    large call trees add no objects for the GC to track. Each row keeps
+    the nanoseconds spent in its profiled children, so own time is known
+    as soon as the call returns. CallFrame objects are only built on
+    demand by to_frames().
+
+    Attributes:
+        fid: Function id per call
+        parent: Row of the calling frame (-1 for roots)
+        start_ns: Start timestamp (integer nanoseconds)
+        end_ns: End timestamp (-1 while the call is running)
+        child_ns: Total duration of the profiled children
+    """
+
+    def __init__(self):
+        self.fid = array('i')
+        self.parent = array('i')
+        self.start_ns = array('q')
+        self.end_ns = array('q')
+        self.child_ns = array('q')
+
+    def __len__(self) -> int:
+        return len(self.fid)
+
+    def push(self, fid: int, parent: int, start_ns: int) -> int:
+        """
+        Record the start of a call
+
+        Args:
+            fid: Function id
+            parent: Row of the calling frame, or -1
+            start_ns: Start timestamp (integer nanoseconds)
+
+        Returns:
+            Row index of the new call
+        """
+        index = len(self.fid)
+        self.fid.append(fid)
+        self.parent.append(parent)
+        self.start_ns.append(start_ns)
+        self.end_ns.append(-1)
+        self.child_ns.append(0)
+        return index
+
+    def finish(self, index: int, end_ns: int) -> None:
+        """Record the end of a call and charge its duration to the parent"""
+        self.end_ns[index] = end_ns
+        parent = self.parent[index]
+        if parent >= 0:
+            self.child_ns[parent] += end_ns - self.start_ns[index]
+
+    def own_time_ns(self) -> Dict[int, int]:
+        """
+        Total own time (excluding profiled children) per function id
+
+        Safe to call while another thread is recording: columns are
+        copied last-appended first and cut to the shortest, so a row
+        that is half-appended is ignored.
+        """
+        n = len(self.child_ns)
+        if np is not None and n:
+            # Copies, not views: a live buffer view would make the
+            # recording thread's next append fail
+            child = np.array(self.child_ns, dtype=np.int64)[:n]
+            end = np.array(self.end_ns, dtype=np.int64)[:n]
+            start = np.array(self.start_ns, dtype=np.int64)[:n]
+            fids = np.array(self.fid, dtype=np.intc)[:n]
+            if njit is not None:
+                own, seen = _own_time_kernel(fids, start, end, child, int(fids.max()) + 1)
+                return {fid: int(own[fid]) for fid in np.flatnonzero(seen).tolist()}
+            done = end >= 0
+            own_ns = np.maximum(end - start - child, 0)[done]
+            fids = fids[done]
+            sums = np.bincount(fids, weights=own_ns)
+            return {fid: int(sums[fid]) for fid in np.unique(fids).tolist()}
+
+        own = {}
+        for fid, start, end, child in zip(self.fid, self.start_ns, self.end_ns, self.child_ns):
+            if end < 0:
+                continue
+            own[fid] = own.get(fid, 0) + max(0, end - start - child)
+        return own
+
+    def clear(self) -> None:
+        """Drop all recorded calls"""
+        del self.fid[:]
+        del self.parent[:]
+        del self.start_ns[:]
+        del self.end_ns[:]
+        del self.child_ns[:]
+
+    def to_frames(self, names: List[str], locations: List[Tuple[str, int]]) -> List[CallFrame]:
+        """
+        Build CallFrame trees from the recorded calls
+
+        Args:
+            names: Function name per function id
+            locations: (filename, line_no) per function id
+
+        Returns:
+            Root call frames, in call order
+        """
+        # child_ns is appended last, so its length counts complete rows
+        n = len(self.child_ns)
+        frames = []
+        roots = []
+        for fid, parent, start in zip(self.fid[:n], self.parent[:n], self.start_ns[:n]):
+            filename, line_no = locations[fid]
+            frame = CallFrame(name=names[fid], filename=filename, line_no=line_no,
+                              start_time=start, end_time=0)
+            frames.append(frame)
+            if parent >= 0:
+                frames[parent].add_child(frame)
+            else:
+                roots.append(frame)
+        # Children always come after their parent, so finalizing in reverse
+        # caches every child's duration before its parent needs it
+        for index in range(len(frames) - 1, -1, -1):
+            end = self.end_ns[index]
+            if end >= 0:
+                frames[index].finalize(end)
+        return roots
@@ -19,6 +19,7 @@ class FunctionStats:
         percentage: Percentage of total execution time
         callers: Dictionary of caller function names and their call counts
         callees: Dictionary of callee function names and their call counts
+        std_time: Standard deviation of the per-call execution time
     """
 
     name: str
@@ -29,6 +30,7 @@ class FunctionStats:
     percentage: float
     callers: Dict[str, int] = field(default_factory=dict)
     callees: Dict[str, int] = field(default_factory=dict)
+    std_time: float = 0.0
 
     def add_caller(self, caller_name: str) -> None:
         """Record that this function was called by caller_name"""
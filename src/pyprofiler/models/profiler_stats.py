@@ -1,7 +1,10 @@
 """
 Profiler statistics data structure
 """
+import heapq
 from dataclasses import dataclass
+from functools import cached_property
+from operator import attrgetter
 from typing import Dict, List
 
 from .function_stats import FunctionStats
@@ -16,25 +19,27 @@ class ProfilerStats:
         total_time: Total execution time
         function_stats: Dictionary mapping function names to their statistics
         function_list: Sorted list of function statistics by total time
+            (computed on first access)
     """
 
     total_time: float
     function_stats: Dict[str, FunctionStats]
-    function_list: List[FunctionStats]
 
     def __init__(self, total_time: float, function_stats: Dict[str, FunctionStats]):
         self.total_time = total_time
         self.function_stats = function_stats
-        # Sort by total time descending
-        self.function_list = sorted(
-            function_stats.values(),
-            key=lambda x: x.total_time,
-            reverse=True
-        )
+
+    @cached_property
+    def function_list(self) -> List[FunctionStats]:
+        """All function statistics sorted by total time descending"""
+        return sorted(self.function_stats.values(), key=attrgetter('total_time'), reverse=True)
 
     def get_top_functions(self, n: int = 10) -> List[FunctionStats]:
         """Get top N functions by total execution time"""
-        return self.function_list[:n]
+        if 'function_list' in self.__dict__ or n >= len(self.function_stats):
+            return self.function_list[:n]
+        # Only the top n are needed: O(N log n) instead of a full sort
+        return heapq.nlargest(n, self.function_stats.values(), key=attrgetter('total_time'))
 
     def get_function_stats(self, name: str) -> FunctionStats:
         """Get statistics for a specific function"""
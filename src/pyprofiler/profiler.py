@@ -2,14 +2,28 @@
 Main profiler module
 """
 from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict
+from functools import wraps
 from typing import Optional
+import gc
+import inspect
+import math
+import random
+import re
+import sys
 import threading
 
 try:
-    from .models import ProfilerStats
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .models import CallFrameArena, FunctionStats, ProfilerStats
     from .utils import Timer
 except ImportError:
-    from models import ProfilerStats
+    from models import CallFrameArena, FunctionStats, ProfilerStats
     from utils import Timer
 
 
@@ -36,6 +50,253 @@ class Profiler(ABC):
         pass
 
 
+def _geometric_skip(sampling_rate):
+    """
+    Draw how many calls to skip until the next sampled one
+
+    Args:
+        sampling_rate: Fraction of calls to profile (0.0-1.0)
+
+    Returns:
+        Calls until the next sample (1 = the next call), math.inf for rate 0
+    """
+    if sampling_rate >= 1.0:
+        return 1
+    if sampling_rate <= 0.0:
+        return math.inf
+    return int(math.log(1.0 - random.random()) / math.log1p(-sampling_rate)) + 1
+
+
+def _geometric_skipper(sampling_rate):
+    """
+    Build the sampler used by the profile hooks and profile_function wrappers
+
+    Rather than one random() per call, callers draw how many calls to
+    skip from a geometric distribution: the same Bernoulli sampling, but
+    only one RNG draw per sampled call, and unlike a fixed stride it
+    can't lock onto a periodic call pattern.
+
+    Args:
+        sampling_rate: Fraction of calls to profile (0.0-1.0)
+
+    Returns:
+        Function returning the number of calls until the next sample,
+        or None when every call is profiled
+    """
+    if sampling_rate >= 1.0:
+        return None
+    if sampling_rate <= 0.0:
+        return lambda: math.inf
+
+    log_1mp = math.log1p(-sampling_rate)
+    rand = random.random
+    return lambda: int(math.log(1.0 - rand()) / log_1mp) + 1
+
+
+# Source for CPUProfiler.profile_function wrappers, specialized on the
+# sampling mode and, for simple signatures, on the parameter list;
+# compiled once per variant
+_WRAPPER_TEMPLATE = """
+def make_wrapper(profiler, func, func_name, fid, next_skip, now_ns):
+    tls = profiler._tls
+    new_state = profiler._new_thread_state
+    names = profiler._function_names
+    avg_times = profiler._function_avg_times
+    sampling_rate = profiler.sampling_rate
+    skip_remaining = next_skip() if next_skip is not None else 0
+
+    def wrapper(*args, **kwargs):
+        nonlocal skip_remaining
+        if not profiler._enabled or not profiler._is_running:
+            return func(*args, **kwargs)
+
+{sampling_branch}
+        # Everything below only touches this thread's state, so no lock
+        # is taken; get_stats() merges the per-thread data
+        state = getattr(tls, 'state', None)
+        if state is None:
+            state = new_state()
+        if fid >= state.size:
+            state.grow(len(names))
+{tree_enter}
+        # Execute the function
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            end_time = now_ns()
+            elapsed = (end_time - start_time) * 1e-9
+{tree_exit}
+            state.count[fid] += 1
+            state.total[fid] += elapsed
+            state.total_sq[fid] += elapsed * elapsed
+{adaptive_update}
+        return result
+
+    return wrapper
+"""
+
+_SAMPLING_BRANCH = """\
+        # Sampling: only profile the call the geometric skip count lands on
+        skip_remaining -= 1
+        if skip_remaining > 0:
+            return func(*args, **kwargs)
+        skip_remaining = next_skip()
+"""
+
+_ADAPTIVE_BRANCH = """\
+        # Sampling: only profile the call the geometric skip count lands on
+        skip_remaining -= 1
+        if skip_remaining > 0:
+            return func(*args, **kwargs)
+
+        # Adaptive sampling: pick the rate for the next draw based on
+        # historical execution time
+        sample_rate = sampling_rate
+        if func_name in avg_times:
+            avg_time = avg_times[func_name]
+            # Slower functions get higher sampling rate
+            if avg_time > 0.001:  # > 1ms
+                sample_rate = min(1.0, sample_rate * 2)
+            elif avg_time > 0.0001:  # > 0.1ms
+                sample_rate = sample_rate
+            else:  # Very fast functions
+                sample_rate = max(0.1, sample_rate / 2)
+        skip_remaining = geometric_skip(sample_rate)
+"""
+
+_ADAPTIVE_UPDATE = """\
+            # Update average time for adaptive sampling (exponential moving
+            # average; a lost update between threads only delays it)
+            avg_times[func_name] = 0.9 * avg_times[func_name] + 0.1 * elapsed
+"""
+
+_TREE_ENTER = """\
+        stack = state.stack
+        arena = state.arena
+
+        # Track caller-callee relationship
+        parent = stack[-1] if stack else -1
+        edge = (names[arena.fid[parent]] if parent >= 0 else '<module>', func_name)
+        edges = state.edges
+        edges[edge] = edges.get(edge, 0) + 1
+
+        # Add a row to the call tree arena
+        start_time = now_ns()
+        row = arena.push(fid, parent, start_time)
+        stack.append(row)
+"""
+
+_TREE_EXIT = """\
+            arena.finish(row, end_time)
+            stack.pop()
+"""
+
+_wrapper_factories = {}
+
+# Identifiers used by the generated wrapper source; a function whose
+# parameter names clash with one of these keeps the generic wrapper
+_WRAPPER_NAMES = frozenset(re.findall(
+    r'[A-Za-z_][A-Za-z0-9_]*',
+    re.sub(r'#.*', '', _WRAPPER_TEMPLATE + _SAMPLING_BRANCH + _ADAPTIVE_BRANCH
+           + _ADAPTIVE_UPDATE + _TREE_ENTER + _TREE_EXIT)
+)) | {'geometric_skip'}
+
+# Wrappers with an explicit parameter list are generated for up to this
+# many parameters
+_MAX_FIXED_PARAMS = 4
+
+
+def _fixed_params(func) -> Optional[tuple]:
+    """
+    Parameter names a specialized wrapper can forward without packing
+
+    Args:
+        func: Function being decorated
+
+    Returns:
+        Tuple of parameter names, or None if func needs the generic
+        (*args, **kwargs) wrapper: defaults, *args/**kwargs,
+        positional-only or keyword-only parameters, too many parameters,
+        or a name used by the wrapper itself
+    """
+    code = getattr(func, '__code__', None)
+    if code is None or getattr(func, '__defaults__', None) or getattr(func, '__kwdefaults__', None):
+        return None
+    if code.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS):
+        return None
+    if code.co_kwonlyargcount or getattr(code, 'co_posonlyargcount', 0):
+        return None
+    if code.co_argcount > _MAX_FIXED_PARAMS:
+        return None
+    params = code.co_varnames[:code.co_argcount]
+    if _WRAPPER_NAMES.intersection(params):
+        return None
+    return params
+
+
+class _ThreadState:
+    """Profiling data recorded by one thread, merged by CPUProfiler.get_stats()"""
+
+    __slots__ = ('stack', 'arena', 'edges', 'count', 'total', 'total_sq', 'size')
+
+    def __init__(self, size: int):
+        self.stack = []                 # Arena rows of currently executing calls
+        self.arena = CallFrameArena()   # One row per profiled call
+        self.edges = {}                 # (caller, callee) -> count
+        self.count = array('q', bytes(8 * size))     # id -> timed calls
+        self.total = array('d', bytes(8 * size))     # id -> total elapsed seconds
+        self.total_sq = array('d', bytes(8 * size))  # id -> sum of squared elapsed seconds
+        self.size = size
+
+    def grow(self, size: int) -> None:
+        """Make room for function ids below size"""
+        extra = size - self.size
+        if extra > 0:
+            self.count.frombytes(bytes(8 * extra))
+            self.total.frombytes(bytes(8 * extra))
+            self.total_sq.frombytes(bytes(8 * extra))
+            self.size = size
+
+    def clear(self) -> None:
+        """Zero the counters in place; the owning thread keeps using them"""
+        n = self.size
+        self.count[:] = array('q', bytes(8 * n))
+        self.total[:] = array('d', bytes(8 * n))
+        self.total_sq[:] = array('d', bytes(8 * n))
+        self.edges.clear()
+        # Running calls still hold their arena rows
+        if not self.stack:
+            self.arena.clear()
+
+
+class _ProfileContext:
+    """Context manager returned by CPUProfiler.profile()"""
+
+    __slots__ = ('profiler', 'enabled', 'old_enabled', 'old_running')
+
+    def __init__(self, profiler: 'CPUProfiler', enabled: bool):
+        self.profiler = profiler
+        self.enabled = enabled
+        self.old_enabled = None
+        self.old_running = None
+
+    def __enter__(self) -> 'CPUProfiler':
+        profiler = self.profiler
+        self.old_enabled = profiler._enabled
+        profiler._enabled = self.enabled
+        self.old_running = profiler._is_running
+        profiler._stats_cache = None
+        profiler._is_running = True
+        profiler._timer.start()
+        return profiler
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        profiler = self.profiler
+        profiler._timer.stop()
+        profiler._is_running = self.old_running
+        profiler._enabled = self.old_enabled
+
+
 class CPUProfiler(Profiler):
     """
     CPU profiler for measuring function execution time
@@ -53,7 +314,8 @@ class CPUProfiler(Profiler):
     """
 
     def __init__(self, interval: float = 0.001, sampling_rate: float = 1.0, adaptive_sampling: bool = False,
-                 real_time_monitoring: bool = False, monitor_interval: float = 1.0):
+                 real_time_monitoring: bool = False, monitor_interval: float = 1.0, freeze_gc: bool = False,
+                 track_call_tree: bool = True):
         """
         Initialize CPU profiler
 
@@ -63,6 +325,13 @@ class CPUProfiler(Profiler):
             adaptive_sampling: If True, adjust sampling rate based on function execution time
             real_time_monitoring: If True, print stats in real-time while profiling
             monitor_interval: Seconds between real-time updates
+            freeze_gc: If True, gc.freeze() the pre-existing heap while profiling
+                so collections only scan objects created during the run; costs
+                a full gc.collect() in start(), so only worth it for long runs
+                over a large heap
+            track_call_tree: If False, decorated functions only record call
+                counts and times (no call tree, callers/callees or own time),
+                which makes each profiled call cheaper
         """
         super().__init__()
         self.interval = interval
@@ -70,28 +339,43 @@ class CPUProfiler(Profiler):
         self.adaptive_sampling = adaptive_sampling
         self.real_time_monitoring = real_time_monitoring
         self.monitor_interval = monitor_interval
+        self.freeze_gc = freeze_gc
+        self.track_call_tree = track_call_tree
+        self._froze_gc = False
         self._call_stack = []
-        self._function_times = {}
-        from collections import defaultdict
-        self._call_counts = defaultdict(int)
+        # Running per-function aggregates as struct-of-arrays indexed by a
+        # function id; no per-call samples are kept
+        self._function_ids = {}         # name -> id
+        self._function_names = []       # id -> name
+        self._fn_count = array('q')     # id -> timed calls
+        self._fn_total = array('d')     # id -> total elapsed seconds
+        self._fn_total_sq = array('d')  # id -> sum of squared elapsed seconds
         self._enabled = True
-        self._sample_counter = 0
-        # Thread-safe locks
+        # Thread-safe lock (function registration, hook merges, readers)
         self._lock = threading.Lock()
-        self._call_start_times_lock = threading.Lock()
-        # Call tree tracking
-        self._call_tree = []  # List of root CallFrame objects
-        self._current_call_frames = []  # Stack of currently executing calls
-        self._caller_callee_counts = defaultdict(lambda: defaultdict(int))  # (caller, callee) -> count
+        # Decorated functions record into per-thread state: call stack,
+        # call tree arena, edges and aggregates
+        self._tls = threading.local()
+        self._thread_states = []
+        self._function_locations = []  # id -> (filename, line_no)
         # Adaptive sampling
         self._function_avg_times = defaultdict(float)  # Track average times for adaptive sampling
         # Real-time monitoring
         self._monitor_thread = None
         self._stop_monitoring = threading.Event()
+        # Stats computed after profiling stopped (invalidated on start/reset)
+        self._stats_cache = None
 
     def start(self) -> None:
         """Start profiling"""
+        self._stats_cache = None
         self._is_running = True
+        # Move the existing heap to the permanent generation; skipped if
+        # someone else already froze objects, so we don't unfreeze theirs
+        if self.freeze_gc and gc.get_freeze_count() == 0:
+            gc.collect()
+            gc.freeze()
+            self._froze_gc = True
         self._timer.start()
 
         # Start real-time monitoring thread if enabled
@@ -104,6 +388,9 @@ class CPUProfiler(Profiler):
         """Stop profiling"""
         self._is_running = False
         self._timer.stop()
+        if self._froze_gc:
+            self._froze_gc = False
+            gc.unfreeze()
 
         # Stop real-time monitoring
         if self._monitor_thread is not None:
@@ -113,13 +400,19 @@ class CPUProfiler(Profiler):
 
     def _monitor_loop(self):
         """Background thread for real-time monitoring"""
-        import sys
+        last_activity = None
         while not self._stop_monitoring.is_set() and self._is_running:
             self._stop_monitoring.wait(self.monitor_interval)
 
             if not self._is_running:
                 break
 
+            # Nothing finished since the last report: skip the rebuild
+            activity = self._activity()
+            if activity == last_activity:
+                continue
+            last_activity = activity
+
             # Print current stats
             stats = self.get_stats()
             if stats and stats.function_list:
@@ -147,8 +440,13 @@ class CPUProfiler(Profiler):
             with open(filepath, 'w', buffering=8192) as f:
                 f.write("[\n")
                 first = True
+                last_activity = None
                 while self._is_running:
-                    stats = self.get_stats()
+                    # Only rebuild and serialize the stats when calls
+                    # finished since the last entry
+                    activity = self._activity()
+                    stats = self.get_stats() if activity != last_activity else None
+                    last_activity = activity
                     if stats and stats.function_list:
                         if not first:
                             f.write(",\n")
@@ -167,7 +465,9 @@ class CPUProfiler(Profiler):
                                 for fs in stats.get_top_functions(10)
                             ]
                         }
-                        f.write(json.dumps(log_entry, indent=2))
+                        # One compact entry per line: still a JSON array,
+                        # and much cheaper to write than indented output
+                        f.write(json.dumps(log_entry, separators=(',', ':')))
 
                     time.sleep(interval)
                 f.write("\n]\n")
@@ -190,93 +490,41 @@ class CPUProfiler(Profiler):
 
         Returns:
             Wrapped function that records execution time
-        """
-        from functools import wraps
-
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if not self._enabled or not self._is_running:
-                return func(*args, **kwargs)
-
-            func_name = func.__name__
-
-            # Adaptive sampling: adjust rate based on historical execution time
-            sample_rate = self.sampling_rate
-            if self.adaptive_sampling and func_name in self._function_avg_times:
-                avg_time = self._function_avg_times[func_name]
-                # Slower functions get higher sampling rate
-                if avg_time > 0.001:  # > 1ms
-                    sample_rate = min(1.0, sample_rate * 2)
-                elif avg_time > 0.0001:  # > 0.1ms
-                    sample_rate = sample_rate
-                else:  # Very fast functions
-                    sample_rate = max(0.1, sample_rate / 2)
-
-            # Sampling: only profile fraction of calls
-            self._sample_counter += 1
-            import random
-            if random.random() > sample_rate:
-                return func(*args, **kwargs)
-
-            # Record function name (thread-safe)
-            with self._lock:
-                self._call_counts[func_name] += 1
-
-            # Track caller-callee relationship
-            caller_name = self._current_call_frames[-1].name if self._current_call_frames else '<module>'
-
-            # Create call frame for call tree tracking
-            try:
-                from .models import CallFrame
-            except ImportError:
-                from models import CallFrame
 
-            start_time = self._timer.get_time()
-            call_frame = CallFrame(
-                name=func_name,
-                filename=func.__code__.co_filename,
-                line_no=func.__code__.co_firstlineno,
-                start_time=start_time,
-                end_time=0.0  # Will be set on return
-            )
-
-            # Add to call tree
-            with self._lock:
-                if self._current_call_frames:
-                    self._current_call_frames[-1].add_child(call_frame)
-                else:
-                    self._call_tree.append(call_frame)
-                self._current_call_frames.append(call_frame)
-                self._caller_callee_counts[caller_name][func_name] += 1
-
-            # Execute the function
-            try:
-                result = func(*args, **kwargs)
-            finally:
-                end_time = self._timer.get_time()
-                elapsed = end_time - start_time
-
-                # Update average time for adaptive sampling
-                if self.adaptive_sampling:
-                    with self._lock:
-                        old_avg = self._function_avg_times[func_name]
-                        # Exponential moving average
-                        self._function_avg_times[func_name] = 0.9 * old_avg + 0.1 * elapsed
-
-                # Update call frame
-                with self._lock:
-                    call_frame.end_time = end_time
-                    self._current_call_frames.pop()
-
-                # Record execution time (thread-safe)
-                with self._lock:
-                    if func_name not in self._function_times:
-                        self._function_times[func_name] = []
-                    self._function_times[func_name].append(elapsed)
-
-            return result
-
-        return wrapper
+        sampling_rate, adaptive_sampling and track_call_tree are read when
+        the function is decorated.
+        """
+        # Invariant per decorated function: resolve once, not per call
+        func_name = func.__name__
+        fid = self._function_id(func_name)
+        self._function_locations[fid] = (func.__code__.co_filename, func.__code__.co_firstlineno)
+
+        # The sampling and call tree setup is fixed per profiler, so pick a
+        # wrapper body with the unused branches left out; simple signatures
+        # also get an explicit parameter list instead of *args/**kwargs
+        params = _fixed_params(func)
+        variant = (self.adaptive_sampling, self.sampling_rate < 1.0, self.track_call_tree, params)
+        factory = _wrapper_factories.get(variant)
+        if factory is None:
+            source = _WRAPPER_TEMPLATE.replace(
+                '{sampling_branch}\n', _ADAPTIVE_BRANCH if variant[0] else
+                _SAMPLING_BRANCH if variant[1] else ''
+            ).replace('{adaptive_update}\n', _ADAPTIVE_UPDATE if variant[0] else ''
+            ).replace('{tree_enter}\n', _TREE_ENTER if variant[2] else '        start_time = now_ns()\n'
+            ).replace('{tree_exit}\n', _TREE_EXIT if variant[2] else '')
+            if params is not None:
+                source = source.replace('*args, **kwargs', ', '.join(params))
+            namespace = {'geometric_skip': _geometric_skip}
+            exec(compile(source, '<pyprofiler wrapper>', 'exec'), namespace)
+            factory = _wrapper_factories[variant] = namespace['make_wrapper']
+
+        wrapper = factory(self, func, func_name, fid, _geometric_skipper(self.sampling_rate),
+                          self._timer.get_time_ns)
+        if params is not None and sys.version_info < (3, 10):
+            # Argument errors are raised by the explicit parameter list and
+            # name the code object before 3.10, not the function's __qualname__
+            wrapper.__code__ = wrapper.__code__.replace(co_name=func_name)
+        return wraps(func)(wrapper)
 
     def profile(self, enabled: bool = True):
         """
@@ -290,23 +538,7 @@ class CPUProfiler(Profiler):
                 # Code to profile
                 pass
         """
-        from contextlib import contextmanager
-
-        @contextmanager
-        def _profile_context():
-            old_enabled = self._enabled
-            self._enabled = enabled
-            old_running = self._is_running
-            self._is_running = True
-            self._timer.start()
-            try:
-                yield self
-            finally:
-                self._timer.stop()
-                self._is_running = old_running
-                self._enabled = old_enabled
-
-        return _profile_context()
+        return _ProfileContext(self, enabled)
 
     def get_stats(self) -> Optional[ProfilerStats]:
         """
@@ -314,40 +546,65 @@ class CPUProfiler(Profiler):
 
         Returns:
             ProfilerStats object with aggregated statistics
+
+        Once profiling has stopped the result is cached, so callers chaining
+        print_stats() and reporters don't rebuild it each time.
         """
-        if not self._function_times:
+        if self._stats_cache is not None and not self._is_running:
+            return self._stats_cache
+
+        # Merge the hook aggregates with every thread's own data
+        with self._lock:
+            states = list(self._thread_states)
+            counts = self._fn_count.tolist()
+            totals = self._fn_total.tolist()
+            totals_sq = self._fn_total_sq.tolist()
+        n = len(counts)
+        own_times = {}  # id -> own time (excluding profiled children) in ns
+        edge_counts = {}
+        for state in states:
+            for fid, (count, total, total_sq) in enumerate(
+                    zip(state.count, state.total, state.total_sq)):
+                if count and fid < n:
+                    counts[fid] += count
+                    totals[fid] += total
+                    totals_sq[fid] += total_sq
+            for fid, own_ns in state.arena.own_time_ns().items():
+                own_times[fid] = own_times.get(fid, 0) + own_ns
+            # list() copies in one step, safe against the owner inserting
+            for edge, count in list(state.edges.items()):
+                edge_counts[edge] = edge_counts.get(edge, 0) + count
+
+        if not any(counts):
             return None
 
         total_time = self._timer.elapsed
 
         # Build function stats with call tree information
-        try:
-            from .models import FunctionStats
-        except ImportError:
-            from models import FunctionStats
         function_stats = {}
 
-        # Calculate own time from call tree (excluding children)
-        own_times = {}
-        for root in self._call_tree:
-            self._calculate_own_time_recursive(root, own_times)
-
-        for func_name, times in self._function_times.items():
-            call_count = len(times)
-            total = sum(times)
-            avg = total / call_count if call_count > 0 else 0
-            own_time = own_times.get(func_name, total)  # Use call tree data if available
+        # Callers and callees for every function in one pass over the edges
+        callers_of = {}
+        callees_of = {}
+        for (caller, callee), count in edge_counts.items():
+            callers_of.setdefault(callee, {})[caller] = count
+            callees_of.setdefault(caller, {})[callee] = count
+
+        for fid in range(n):
+            call_count = counts[fid]
+            if not call_count:
+                continue
+            func_name = self._function_names[fid]
+            total = totals[fid]
+            avg = total / call_count
+            # Population standard deviation from the running sums; clamp the
+            # rounding error that can make the variance slightly negative
+            std = math.sqrt(max(0.0, totals_sq[fid] / call_count - avg * avg))
+            own_ns = own_times.get(fid)
+            own_time = total if own_ns is None else own_ns * 1e-9  # Use call tree data if available
             percentage = (total / total_time * 100) if total_time > 0 else 0
-
-            # Collect callers and callees
-            callers = {}
-            callees = {}
-            for caller, callee_dict in self._caller_callee_counts.items():
-                for callee, count in callee_dict.items():
-                    if callee == func_name:
-                        callers[caller] = callers.get(caller, 0) + count
-                    if caller == func_name:
-                        callees[callee] = callees.get(callee, 0) + count
+            callers = callers_of.get(func_name, {})
+            callees = callees_of.get(func_name, {})
 
             function_stats[func_name] = FunctionStats(
                 name=func_name,
@@ -357,25 +614,92 @@ class CPUProfiler(Profiler):
                 own_time=own_time,
                 percentage=percentage,
                 callers=callers,
-                callees=callees
+                callees=callees,
+                std_time=std
             )
 
-        return ProfilerStats(
+        stats = ProfilerStats(
             total_time=total_time,
             function_stats=function_stats
         )
+        if not self._is_running:
+            self._stats_cache = stats
+        return stats
+
+    def _function_id(self, func_name: str) -> int:
+        """Return the aggregate-array index for func_name, adding it if new"""
+        fid = self._function_ids.get(func_name)
+        if fid is None:
+            with self._lock:
+                fid = self._function_ids.get(func_name)
+                if fid is None:
+                    fid = len(self._function_names)
+                    self._function_names.append(func_name)
+                    self._fn_count.append(0)
+                    self._fn_total.append(0.0)
+                    self._fn_total_sq.append(0.0)
+                    self._function_locations.append(('', 0))
+                    self._function_ids[func_name] = fid
+        return fid
+
+    def _activity(self) -> int:
+        """Number of timed calls recorded so far, a cheap change detector"""
+        with self._lock:
+            states = list(self._thread_states)
+            total = sum(self._fn_count)
+        for state in states:
+            total += sum(state.count)
+        return total
+
+    def _new_thread_state(self) -> _ThreadState:
+        """Create and register the calling thread's recording state"""
+        with self._lock:
+            state = _ThreadState(len(self._function_names))
+            self._thread_states.append(state)
+        self._tls.state = state
+        return state
+
+    def _add_times(self, func_name: str, times: array, scale: float = 1.0) -> None:
+        """
+        Fold a buffer of elapsed times into a function's aggregates
 
-    def _calculate_own_time_recursive(self, frame, own_times):
-        """Recursively calculate own time (excluding children) from call tree"""
-        children_time = sum(child.duration for child in frame.children)
-        own = max(0, frame.duration - children_time)
+        Args:
+            func_name: Function name
+            times: array of elapsed times, one per call
+            scale: Seconds per unit of times (1e-9 for nanoseconds)
+        """
+        if not times:
+            return
+        if np is not None:
+            # Reduce in C without boxing each sample
+            values = np.asarray(times, dtype=np.float64)
+            total = float(values.sum())
+            total_sq = float(values.dot(values))
+        else:
+            total = sum(times)
+            total_sq = sum([t * t for t in times])
+        total *= scale
+        total_sq *= scale * scale
 
-        if frame.name not in own_times:
-            own_times[frame.name] = 0
-        own_times[frame.name] += own
+        fid = self._function_id(func_name)
+        with self._lock:
+            self._fn_count[fid] += len(times)
+            self._fn_total[fid] += total
+            self._fn_total_sq[fid] += total_sq
 
-        for child in frame.children:
-            self._calculate_own_time_recursive(child, own_times)
+    def get_call_tree(self) -> list:
+        """
+        Build the recorded call tree
+
+        Returns:
+            Root CallFrame objects, in call order per thread
+        """
+        with self._lock:
+            states = list(self._thread_states)
+        roots = []
+        for state in states:
+            roots.extend(state.arena.to_frames(self._function_names, self._function_locations))
+        return roots
 
     def print_stats(self, top_n: int = 10) -> None:
         """
@@ -389,20 +713,20 @@ class CPUProfiler(Profiler):
             print("No profiling data available")
             return
 
-        print(f"\n{'Function':<30} {'Calls':<10} {'Total(s)':<12} {'Own(s)':<12} {'%'}")
-        print("-" * 80)
-
-        for func_stats in stats.get_top_functions(top_n):
-            print(
-                f"{func_stats.name:<30} "
-                f"{func_stats.call_count:<10} "
-                f"{func_stats.total_time:<12.6f} "
-                f"{func_stats.own_time:<12.6f} "
-                f"{func_stats.percentage:>6.1f}%"
-            )
-
-        print("-" * 80)
-        print(f"Total time: {stats.total_time:.6f}s")
+        sys.stdout.write('\n' + '\n'.join(self._format_stats_lines(stats, top_n)) + '\n')
+
+    @staticmethod
+    def _format_stats_lines(stats: ProfilerStats, top_n: int) -> list:
+        """Format the stats table shared by print_stats() and save_stats()"""
+        row = "{:<30} {:<10} {:<12.6f} {:<12.6f} {:>6.1f}%".format
+        lines = [f"{'Function':<30} {'Calls':<10} {'Total(s)':<12} {'Own(s)':<12} {'%'}", "-" * 80]
+        lines.extend([
+            row(f.name, f.call_count, f.total_time, f.own_time, f.percentage)
+            for f in stats.get_top_functions(top_n)
+        ])
+        lines.append("-" * 80)
+        lines.append(f"Total time: {stats.total_time:.6f}s")
+        return lines
 
     def save_stats(self, filepath: str, top_n: int = 10) -> None:
         """
@@ -419,21 +743,7 @@ class CPUProfiler(Profiler):
             return
 
         # Build output in memory for efficiency
-        lines = []
-        lines.append(f"{'Function':<30} {'Calls':<10} {'Total(s)':<12} {'Own(s)':<12} {'%'}")
-        lines.append("-" * 80)
-
-        for func_stats in stats.get_top_functions(top_n):
-            lines.append(
-                f"{func_stats.name:<30} "
-                f"{func_stats.call_count:<10} "
-                f"{func_stats.total_time:<12.6f} "
-                f"{func_stats.own_time:<12.6f} "
-                f"{func_stats.percentage:>6.1f}%"
-            )
-
-        lines.append("-" * 80)
-        lines.append(f"Total time: {stats.total_time:.6f}s")
+        lines = self._format_stats_lines(stats, top_n)
 
         # Write all at once with buffering
         with open(filepath, 'w', encoding='utf-8', buffering=8192) as f:
@@ -483,7 +793,6 @@ class CPUProfiler(Profiler):
         Args:
             filename: Optional file path to write pstats output
         """
-        import sys
         stats = self.get_stats()
         if stats is None:
             return
@@ -539,15 +848,18 @@ class CPUProfiler(Profiler):
 
     def reset(self) -> None:
         """Reset all profiling data"""
-        from collections import defaultdict
         self._call_stack = []
-        self._function_times = {}
-        self._call_counts = defaultdict(int)
-        self._call_tree = []
-        self._current_call_frames = []
-        self._caller_callee_counts.clear()
+        # Function ids stay valid so existing wrappers keep working
+        n = len(self._function_names)
+        self._fn_count[:] = array('q', bytes(8 * n))
+        self._fn_total[:] = array('d', bytes(8 * n))
+        self._fn_total_sq[:] = array('d', bytes(8 * n))
+        with self._lock:
+            for state in self._thread_states:
+                state.clear()
         self._function_avg_times.clear()
         self._timer.reset()
+        self._stats_cache = None
 
 
 # Convenience function
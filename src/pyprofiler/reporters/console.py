@@ -1,11 +1,21 @@
 """
 Console reporter for profiling statistics
 """
+import heapq
+from operator import attrgetter
 from typing import Optional
 
 from ..models import ProfilerStats
 
 
+# sort_by -> FunctionStats attribute, largest first
+_SORT_KEYS = {
+    'total': attrgetter('total_time'),
+    'own': attrgetter('own_time'),
+    'calls': attrgetter('call_count'),
+}
+
+
 class ConsoleReporter:
     """Reporter for console output"""
 
@@ -49,19 +59,17 @@ class ConsoleReporter:
             "-" * 80
         ]
 
-        # Sort functions based on sort_by
-        functions = list(stats.function_stats.values())
-        if self.sort_by == 'total':
-            functions.sort(key=lambda x: x.total_time, reverse=True)
-        elif self.sort_by == 'own':
-            functions.sort(key=lambda x: x.own_time, reverse=True)
-        elif self.sort_by == 'calls':
-            functions.sort(key=lambda x: x.call_count, reverse=True)
+        # Select the top N based on sort_by: O(F log N) instead of a full sort
+        functions = stats.function_stats.values()
+        if self.sort_by in _SORT_KEYS:
+            functions = heapq.nlargest(self.top_n, functions, key=_SORT_KEYS[self.sort_by])
         elif self.sort_by == 'name':
-            functions.sort(key=lambda x: x.name)
+            functions = heapq.nsmallest(self.top_n, functions, key=attrgetter('name'))
+        else:
+            functions = list(functions)[:self.top_n]
 
         # Add top N functions
-        for func_stats in functions[:self.top_n]:
+        for func_stats in functions:
             lines.append(
                 f"{func_stats.name:<30} "
                 f"{func_stats.call_count:<10} "
@@ -4,6 +4,21 @@ Flame graph reporter for Chrome DevTools compatible output
 import json
 from typing import Any, Dict, List
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the standard library json module is used instead
+    orjson = None
+
+
+def _dumps(obj, pretty: bool = False) -> str:
+    """Serialize obj as JSON (indented if pretty), using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode('utf-8')
+    if pretty:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(',', ':'))
+
 
 class FlameGraphReporter:
     """Reporter for Chrome DevTools compatible flame graph"""
@@ -12,20 +27,21 @@ class FlameGraphReporter:
         """Initialize flame graph reporter"""
         pass
 
-    def report(self, stats, output: str = 'flamegraph.json') -> None:
+    def report(self, stats, output: str = 'flamegraph.json', pretty: bool = False) -> None:
         """
         Generate flame graph in Chrome DevTools format
 
         Args:
             stats: Profiler statistics
             output: Output file path
+            pretty: If True, indent the JSON (larger and slower to write)
         """
         # Convert stats to Chrome DevTools format
         profile = self._convert_to_chrome_format(stats)
 
-        # Write to file
-        with open(output, 'w') as f:
-            json.dump(profile, f, indent=2)
+        # Write to file (orjson emits raw non-ASCII, so always UTF-8)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(_dumps(profile, pretty))
 
         print(f"Flame graph saved to {output}")
 
@@ -36,44 +52,34 @@ class FlameGraphReporter:
         Returns:
             Dictionary in Chrome DevTools profile format
         """
-        # Create a simplified profile structure
-        profile = {
-            "nodes": [],
-            "samples": [],
-            "timeDeltas": [],
-            "startTime": 0,
-            "endTime": 0
-        }
-
-        node_id = 0
-        node_map = {}
-
-        # Create root node
-        root_id = node_id
-        profile["nodes"].append({
-            "id": root_id,
+        # Create a simplified profile structure: a root node followed by
+        # one node per function, built in a single comprehension
+        nodes = [{
+            "id": 0,
             "name": "root",
             "script": "",
             "line": 0,
-            "callUID": root_id,
+            "callUID": 0,
             "children": []
-        })
-        node_map["root"] = root_id
-        node_id += 1
-
-        # Add function nodes
-        for func_name, func_stats in stats.function_stats.items():
-            func_id = node_id
-            profile["nodes"].append({
+        }]
+        nodes += [
+            {
                 "id": func_id,
                 "name": func_name,
                 "script": func_name,  # Simplified
                 "line": 0,
                 "callUID": func_id,
                 "children": []
-            })
-            node_map[func_name] = func_id
-            node_id += 1
+            }
+            for func_id, func_name in enumerate(stats.function_stats, 1)
+        ]
+        profile = {
+            "nodes": nodes,
+            "samples": [],
+            "timeDeltas": [],
+            "startTime": 0,
+            "endTime": 0
+        }
 
         # Create samples (simplified - just showing function calls)
         profile["startTime"] = 0
@@ -89,13 +95,15 @@ class FlameGraphReporter:
             stats: Profiler statistics
             output: Output HTML file path
         """
-        # Generate JSON data
+        # Generate JSON data, serialized once for both slots below
         profile = self._convert_to_chrome_format(stats)
+        data = _dumps(profile)
 
         # Create HTML with embedded viewer
         html = f"""<!DOCTYPE html>
 <html>
 <head>
+    <meta charset="utf-8">
     <title>Flame Graph</title>
     <style>
         body {{
@@ -116,16 +124,16 @@ class FlameGraphReporter:
         <p>Total time: {stats.total_time:.6f}s</p>
         <p>Functions profiled: {len(stats.function_stats)}</p>
     </div>
-    <pre id="profile-data" style="display:none;">{json.dumps(profile, indent=2)}</pre>
+    <pre id="profile-data" style="display:none;">{data}</pre>
     <div id="viewer">
         <p>Chrome DevTools flame graph viewer will be embedded here.</p>
         <p>For now, here's the raw data:</p>
-        <pre>{json.dumps(profile, indent=2)}</pre>
+        <pre>{data}</pre>
     </div>
 </body>
 </html>"""
 
-        with open(output, 'w') as f:
+        with open(output, 'w', encoding='utf-8') as f:
             f.write(html)
 
         print(f"Flame graph HTML saved to {output}")
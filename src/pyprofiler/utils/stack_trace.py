@@ -1,7 +1,7 @@
 """
 Stack trace utilities for profiling
 """
-import inspect
+import sys
 from typing import Optional, Tuple
 
 
@@ -16,16 +16,12 @@ class StackTrace:
         Returns:
             Tuple of (function_name, filename, line_number)
         """
-        frame = inspect.currentframe()
-
         # Skip this function's frame and the caller's frame
         # to get the actual function being profiled
-        if frame is not None:
-            frame = frame.f_back
-            if frame is not None:
-                frame = frame.f_back
-
-        if frame is None:
+        try:
+            frame = sys._getframe(2)
+        except ValueError:
+            # The stack is not that deep
             return ("unknown", "unknown", 0)
 
         code = frame.f_code
@@ -46,15 +42,12 @@ class StackTrace:
         Returns:
             Tuple of (function_name, filename, line_number)
         """
-        frame = inspect.currentframe()
-
-        # Navigate to the desired depth
+        # Jump straight to the desired depth;
         # depth + 1 to skip get_frame_info itself
-        for _ in range(depth + 1):
-            if frame is not None:
-                frame = frame.f_back
-
-        if frame is None:
+        try:
+            frame = sys._getframe(depth + 1)
+        except ValueError:
+            # The stack is not that deep
             return ("unknown", "unknown", 0)
 
         code = frame.f_code
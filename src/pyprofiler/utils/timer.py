@@ -8,19 +8,22 @@ from typing import Generator
 
 class Timer:
     """
-    High-precision timer using monotonic clock
+    High-precision timer using the performance counter
 
-    Uses time.monotonic() which is guaranteed to not go backwards
-    and is not affected by system clock changes.
+    Uses time.perf_counter_ns(), the highest-resolution clock available,
+    which is guaranteed to not go backwards and is not affected by system
+    clock changes. Timestamps are integer nanoseconds, so differences are
+    exact integer subtractions; elapsed times are converted to seconds
+    on output.
     """
 
     def __init__(self):
-        self._start_time: float = 0.0
-        self._end_time: float = 0.0
+        self._start_time: int = 0
+        self._end_time: int = 0
 
     def start(self) -> None:
         """Start the timer"""
-        self._start_time = time.monotonic()
+        self._start_time = time.perf_counter_ns()
 
     def stop(self) -> float:
         """
@@ -29,28 +32,33 @@ class Timer:
         Returns:
             Elapsed time in seconds
         """
-        self._end_time = time.monotonic()
+        self._end_time = time.perf_counter_ns()
         return self.elapsed
 
     @property
     def elapsed(self) -> float:
         """Get elapsed time without stopping the timer"""
-        if self._end_time == 0.0:
+        if self._end_time == 0:
             # Timer is still running
-            return time.monotonic() - self._start_time
+            return (time.perf_counter_ns() - self._start_time) * 1e-9
         else:
             # Timer has been stopped
-            return self._end_time - self._start_time
+            return (self._end_time - self._start_time) * 1e-9
 
     @staticmethod
     def get_time() -> float:
-        """Get current monotonic time"""
-        return time.monotonic()
+        """Get current performance counter time"""
+        return time.perf_counter()
+
+    @staticmethod
+    def get_time_ns() -> int:
+        """Get current performance counter time in integer nanoseconds"""
+        return time.perf_counter_ns()
 
     def reset(self) -> None:
         """Reset the timer"""
-        self._start_time = 0.0
-        self._end_time = 0.0
+        self._start_time = 0
+        self._end_time = 0
 
     @contextmanager
     def context(self) -> Generator['Timer', None, None]:
@@ -63,5 +71,10 @@ class Timer:
 
 
 def get_time() -> float:
-    """Convenience function to get current monotonic time"""
-    return time.monotonic()
+    """Convenience function to get current performance counter time"""
+    return time.perf_counter()
+
+
+def get_time_ns() -> int:
+    """Convenience function to get current performance counter time in nanoseconds"""
+    return time.perf_counter_ns()
@@ -4,29 +4,51 @@ Import test for pyprofiler package
 Run this to verify all modules can be imported without errors
 """
 
+import importlib.util
 import sys
-from pathlib import Path
 
-# Add src directory to path
-src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_path))
+MODULES = ("pyprofiler", "pyprofiler.models", "pyprofiler.utils", "pyprofiler.reporters")
 
-def test_imports():
-    """Test all imports"""
+def test_imports(quick=False):
+    """
+    Test all imports
+
+    Args:
+        quick: Only locate the modules instead of importing their public
+            names (skips running their top-level code)
+    """
     print("Testing imports...")
 
+    if quick:
+        missing = []
+        for name in MODULES:
+            try:
+                spec = importlib.util.find_spec(name)
+            except ModuleNotFoundError:
+                # A submodule's parent package is missing
+                spec = None
+            if spec is None:
+                missing.append(name)
+            else:
+                print(f"✓ {name} found")
+        if missing:
+            print(f"\n❌ Modules not found: {', '.join(missing)}")
+            return False
+        print("\n✅ All modules found! (run without --quick to import them)")
+        return True
+
     try:
-        from profiler import CPUProfiler, MemoryProfiler
-        print("✓ profiler module imported successfully")
+        from pyprofiler import CPUProfiler, MemoryProfiler
+        print("✓ pyprofiler module imported successfully")
 
-        from profiler.models import CallFrame, FunctionStats, ProfilerStats
-        print("✓ profiler.models imported successfully")
+        from pyprofiler.models import CallFrame, FunctionStats, ProfilerStats
+        print("✓ pyprofiler.models imported successfully")
 
-        from profiler.utils import Timer, StackTrace
-        print("✓ profiler.utils imported successfully")
+        from pyprofiler.utils import Timer, StackTrace
+        print("✓ pyprofiler.utils imported successfully")
 
-        from profiler.reporters import ConsoleReporter, FlameGraphReporter
-        print("✓ profiler.reporters imported successfully")
+        from pyprofiler.reporters import ConsoleReporter, FlameGraphReporter
+        print("✓ pyprofiler.reporters imported successfully")
 
         print("\n✅ All imports successful!")
         return True
@@ -36,5 +58,5 @@ def test_imports():
         return False
 
 if __name__ == "__main__":
-    success = test_imports()
+    success = test_imports(quick="--quick" in sys.argv[1:])
     sys.exit(0 if success else 1)
@@ -1,11 +1,24 @@
 """
 Sample code for profiling tests
 """
+import os
 import time
+from functools import lru_cache
 
+# Sleep length for sleep_function(); set PYPROFILER_SLEEP=0 to skip the wait
+_SLEEP = float(os.environ.get('PYPROFILER_SLEEP', '0.01'))
 
+
+def fibonacci_uncached(n: int) -> int:
+    """Calculate fibonacci number (recursive, inefficient; deep call trees)"""
+    if n <= 1:
+        return n
+    return fibonacci_uncached(n - 1) + fibonacci_uncached(n - 2)
+
+
+@lru_cache(maxsize=None)
 def fibonacci(n: int) -> int:
-    """Calculate fibonacci number (recursive, inefficient)"""
+    """Calculate fibonacci number (recursive, memoized)"""
     if n <= 1:
         return n
     return fibonacci(n - 1) + fibonacci(n - 2)
@@ -13,10 +26,9 @@ def fibonacci(n: int) -> int:
 
 def heavy_computation():
     """Simulate heavy computation"""
-    result = 0
-    for i in range(1000):
-        result += sum(range(100))
-    return result
+    # Same result as summing range(100) a thousand times, without the
+    # Python-level outer loop
+    return 1000 * sum(range(100))
 
 
 def light_computation():
@@ -33,9 +45,9 @@ def mixed_workload():
         heavy_computation()
 
 
-def sleep_function():
-    """Sleep for a short time"""
-    time.sleep(0.01)
+def sleep_function(duration: float = _SLEEP):
+    """Sleep for a short time (default: PYPROFILER_SLEEP, or 0.01s)"""
+    time.sleep(duration)
 
 
 def sample_function():
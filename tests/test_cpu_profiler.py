@@ -1,27 +1,18 @@
 """
 Tests for CPU profiler
 """
+import logging
 import sys
-from pathlib import Path
 
-# Add src to path (for local development only)
-# When package is installed, this is not needed
-src_path = Path(__file__).parent.parent / "src"
-if not (src_path / "pyprofiler").exists():
-    sys.path.insert(0, str(src_path))
+from pyprofiler import CPUProfiler
 
-# Use installed package
-try:
-    from pyprofiler import CPUProfiler
-except ImportError:
-    # Fallback to local import
-    from profiler import CPUProfiler
-
-from tests.fixtures.sample_code import heavy_computation, light_computation
+log = logging.getLogger(__name__)
 
 
 def test_profiler_decorator():
     """Test profiling with decorator"""
+    from tests.fixtures.sample_code import heavy_computation
+
     profiler = CPUProfiler()
     profiler.start()
 
@@ -37,11 +28,13 @@ def test_profiler_decorator():
     assert stats is not None
     assert 'test_function' in stats.function_stats
     assert stats.function_stats['test_function'].call_count == 1
-    print("✓ Decorator test passed")
+    log.debug("Decorator test passed")
 
 
 def test_profiler_context_manager():
     """Test profiling with context manager"""
+    from tests.fixtures.sample_code import heavy_computation, light_computation
+
     profiler = CPUProfiler()
 
     @profiler.profile_function
@@ -60,11 +53,13 @@ def test_profiler_context_manager():
 
     assert stats is not None
     assert len(stats.function_stats) > 0
-    print("✓ Context manager test passed")
+    log.debug("Context manager test passed")
 
 
 def test_profiler_multiple_calls():
     """Test profiling with multiple function calls"""
+    from tests.fixtures.sample_code import light_computation
+
     profiler = CPUProfiler()
     profiler.start()
 
@@ -80,11 +75,13 @@ def test_profiler_multiple_calls():
 
     assert stats is not None
     assert stats.function_stats['test_function'].call_count == 10
-    print("✓ Multiple calls test passed")
+    log.debug("Multiple calls test passed")
 
 
 def test_profiler_stats():
     """Test profiler statistics accuracy"""
+    from tests.fixtures.sample_code import heavy_computation
+
     profiler = CPUProfiler()
     profiler.start()
 
@@ -102,19 +99,430 @@ def test_profiler_stats():
     assert stats.total_time > 0
     assert 'test_func' in stats.function_stats
     assert stats.function_stats['test_func'].call_count == 3
-    print("✓ Stats accuracy test passed")
+    assert stats.function_stats['test_func'].std_time >= 0
+    log.debug("Stats accuracy test passed")
 
 
-def run_all_tests():
-    """Run all tests"""
-    print("Running CPU profiler tests...\n")
+def test_profiler_std_time():
+    """Test the per-call standard deviation from the running sums"""
+    from array import array
+
+    profiler = CPUProfiler()
+    profiler.start()
+    # Hook buffers: seconds, and nanoseconds with a scale
+    profiler._add_times('spread', array('d', [1.0, 3.0]))
+    profiler._add_times('spread', array('q', [1_000_000_000, 3_000_000_000]), 1e-9)
+    profiler._add_times('steady', array('d', [0.5, 0.5, 0.5]))
+    profiler.stop()
+
+    stats = profiler.get_stats().function_stats
+    assert stats['spread'].call_count == 4
+    assert abs(stats['spread'].avg_time - 2.0) < 1e-9
+    assert abs(stats['spread'].std_time - 1.0) < 1e-9
+    assert stats['steady'].std_time < 1e-9
+    log.debug("Standard deviation test passed")
+
+
+def test_profiler_stats_cached():
+    """Test stats are reused after stop and rebuilt after restart"""
+    from tests.fixtures.sample_code import light_computation
 
-    test_profiler_decorator()
-    test_profiler_context_manager()
-    test_profiler_multiple_calls()
-    test_profiler_stats()
+    profiler = CPUProfiler()
+    profiler.start()
+
+    @profiler.profile_function
+    def test_func():
+        return light_computation()
+
+    test_func()
+    profiler.stop()
+
+    stats = profiler.get_stats()
+    assert profiler.get_stats() is stats
+
+    profiler.start()
+    test_func()
+    profiler.stop()
+
+    restarted = profiler.get_stats()
+    assert restarted is not stats
+    assert restarted.function_stats['test_func'].call_count == 2
+    log.debug("Stats cache test passed")
+
+
+def test_profiler_call_tree():
+    """Test the recorded call tree and that reset() clears it"""
+    import gc
+
+    from tests.fixtures.sample_code import light_computation
+
+    profiler = CPUProfiler()
+
+    @profiler.profile_function
+    def outer():
+        return inner()
+
+    @profiler.profile_function
+    def inner():
+        return light_computation()
+
+    gc_enabled = gc.isenabled()
+    profiler.start()
+    outer()
+    profiler.stop()
+    assert gc.isenabled() == gc_enabled
+
+    roots = profiler.get_call_tree()
+    assert [root.name for root in roots] == ['outer']
+    assert [child.name for child in roots[0].children] == ['inner']
+    assert roots[0].own_time <= roots[0].duration
+
+    profiler.reset()
+    assert profiler.get_call_tree() == []
+
+    profiler.start()
+    outer()
+    profiler.stop()
+    assert len(profiler.get_call_tree()) == 1
+
+    stats = profiler.get_stats()
+    assert stats.function_stats['outer'].call_count == 1
+    assert stats.function_stats['inner'].call_count == 1
+    assert stats.function_stats['outer'].own_time <= stats.function_stats['outer'].total_time
+    log.debug("Call tree test passed")
+
+
+def test_profiler_flat_stats():
+    """Test profiling without the call tree"""
+    from tests.fixtures.sample_code import light_computation
+
+    profiler = CPUProfiler(track_call_tree=False)
+
+    @profiler.profile_function
+    def outer():
+        return inner()
+
+    @profiler.profile_function
+    def inner():
+        return light_computation()
+
+    profiler.start()
+    for _ in range(3):
+        outer()
+    profiler.stop()
+
+    assert profiler.get_call_tree() == []
+    stats = profiler.get_stats()
+    outer_stats = stats.function_stats['outer']
+    assert outer_stats.call_count == 3
+    assert stats.function_stats['inner'].call_count == 3
+    # No tree: own time falls back to total time
+    assert outer_stats.own_time == outer_stats.total_time
+    assert outer_stats.callers == {}
+    log.debug("Flat stats test passed")
+
+
+def test_profiler_wrapper_signatures():
+    """Test that wrappers forward positional, keyword and default arguments"""
+    profiler = CPUProfiler()
+
+    @profiler.profile_function
+    def add(x, y):
+        return x + y
+
+    @profiler.profile_function
+    def scale(x, factor=2):
+        return x * factor
 
-    print("\n✅ All tests passed!")
+    @profiler.profile_function
+    def pack(*args, **kwargs):
+        return args, kwargs
+
+    class Counter:
+        @profiler.profile_function
+        def double(self, value):
+            return value * 2
+
+    profiler.start()
+    assert add(1, 2) == 3
+    assert add(y=5, x=1) == 6
+    assert scale(3) == 6
+    assert pack(1, key=2) == ((1,), {'key': 2})
+    assert Counter().double(4) == 8
+    try:
+        add(1)
+    except TypeError as e:
+        # Arity errors name the decorated function, not the wrapper
+        assert 'add()' in str(e) and 'wrapper()' not in str(e), e
+    else:
+        raise AssertionError("missing argument was accepted")
+    try:
+        Counter().double(1, 2)
+    except TypeError as e:
+        assert 'double()' in str(e) and 'wrapper()' not in str(e), e
+    else:
+        raise AssertionError("extra argument was accepted")
+    profiler.stop()
+
+    stats = profiler.get_stats()
+    assert stats.function_stats['add'].call_count == 2
+    assert stats.function_stats['double'].call_count == 1
+    log.debug("Wrapper signature test passed")
+
+
+def test_function_bias():
+    """Test that an undecorated inner call doesn't inflate a function's time"""
+    import time
+
+    def square(i):
+        return i * i
+
+    def inlined():
+        total = 0
+        for i in range(20000):
+            total += i * i
+        return total
+
+    def with_call():
+        total = 0
+        for i in range(20000):
+            total += square(i)
+        return total
+
+    def elapsed(func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    profiler = CPUProfiler()
+    profiled_inlined = profiler.profile_function(inlined)
+    profiled_with_call = profiler.profile_function(with_call)
+
+    # Interleave plain and profiled runs so machine noise hits both alike,
+    # and compare the fastest run of each
+    plain = {'inlined': [], 'with_call': []}
+    profiler.start()
+    for _ in range(7):
+        plain['inlined'].append(elapsed(inlined))
+        plain['with_call'].append(elapsed(with_call))
+        profiled_inlined()
+        profiled_with_call()
+    profiler.stop()
+
+    profiled = {'inlined': [], 'with_call': []}
+    for root in profiler.get_call_tree():
+        profiled[root.name].append(root.duration)
+
+    # Cost ratio of the two variants with and without the profiler
+    actual = min(plain['with_call']) / min(plain['inlined'])
+    reported = min(profiled['with_call']) / min(profiled['inlined'])
+    assert abs(reported / actual - 1) < 0.25
+    log.debug("Function bias test passed")
+
+
+def test_run_statement():
+    """Test profiling a code string with pyprofiler.run()"""
+    from pyprofiler import run
+
+    stats = run(
+        "def square(x):\n"
+        "    return x * x\n"
+        "for i in range(5):\n"
+        "    square(i)\n"
+    )
+
+    assert stats is not None
+    assert stats.function_stats['square'].call_count == 5
+    log.debug("run() test passed")
+
+
+def test_run_uses_profile_hook():
+    """Test that run() hooks calls and returns, never individual lines"""
+    from pyprofiler import run
+
+    # The statement runs while the hook is installed: calls are counted
+    # by a profile hook (setprofile, C hook or sys.monitoring), and no
+    # per-line trace function is set
+    stats = run(
+        "import sys\n"
+        "def check():\n"
+        "    assert sys.gettrace() is None\n"
+        "check()\n"
+    )
+
+    assert stats is not None
+    assert stats.function_stats['check'].call_count == 1
+    assert sys.getprofile() is None and sys.gettrace() is None
+    log.debug("run() profile hook test passed")
+
+
+def test_run_dynamic_functions():
+    """Test that run() tells apart functions created and freed while running"""
+    from pyprofiler import run
+
+    # Each exec'd function is freed after its call, so a later code object
+    # can land at the same address
+    stats = run(
+        "for i in range(200):\n"
+        "    namespace = {}\n"
+        "    exec('def f_%d():\\n    return %d' % (i, i), namespace)\n"
+        "    namespace['f_%d' % i]()\n"
+    )
+
+    assert stats is not None
+    dynamic = {name: fs.call_count for name, fs in stats.function_stats.items()
+               if name.startswith('f_')}
+    assert len(dynamic) == 200
+    assert set(dynamic.values()) == {1}
+    log.debug("run() dynamic functions test passed")
+
+
+def test_run_sampling_rate():
+    """Test that run() profiles roughly sampling_rate of the calls"""
+    from pyprofiler import run
+
+    stats = run(
+        "def square(x):\n"
+        "    return x * x\n"
+        "for i in range(4000):\n"
+        "    square(i)\n",
+        sampling_rate=0.25
+    )
+
+    assert stats is not None
+    assert 700 < stats.function_stats['square'].call_count < 1300
+    log.debug("run() sampling test passed")
+
+
+def test_profiler_sampling_rate():
+    """Test that profile_function records roughly sampling_rate of the calls"""
+    profiler = CPUProfiler(sampling_rate=0.25)
+    profiler.start()
+
+    @profiler.profile_function
+    def square(x):
+        return x * x
+
+    for i in range(4000):
+        square(i)
+
+    profiler.stop()
+    stats = profiler.get_stats()
+
+    assert stats is not None
+    assert 700 < stats.function_stats['square'].call_count < 1300
+    log.debug("Decorator sampling test passed")
+
+
+def test_run_statement_threads():
+    """Test that run() profiles calls made in threads started while it runs"""
+    from pyprofiler import run
+
+    stats = run(
+        "import threading\n"
+        "def work():\n"
+        "    return sum(range(100))\n"
+        "t = threading.Thread(target=work)\n"
+        "t.start()\n"
+        "t.join()\n"
+    )
+
+    assert stats is not None
+    assert stats.function_stats['work'].call_count == 1
+
+    # Threads started by code the statement calls, not the statement itself
+    import threading
+    from pyprofiler import runctx
+
+    def worker():
+        return sum(range(100))
+
+    def spawn():
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+
+    stats = runctx("spawn()\n", {'spawn': spawn}, {})
+    assert stats.function_stats['worker'].call_count == 1
+
+    # Threads that were already running before run() are not profiled
+    go = threading.Event()
+    done = threading.Event()
+
+    def old_thread_work():
+        return sum(range(100))
+
+    def background():
+        go.wait()
+        old_thread_work()
+        done.set()
+
+    t = threading.Thread(target=background)
+    t.start()
+    try:
+        stats = runctx("go.set()\ndone.wait()\n", {'go': go, 'done': done}, {})
+    finally:
+        go.set()
+        t.join()
+    assert 'old_thread_work' not in (stats.function_stats if stats else {})
+
+    stats = run(
+        "import threading\n"
+        "def work():\n"
+        "    return sum(range(100))\n"
+        "def main():\n"
+        "    t = threading.Thread(target=work)\n"
+        "    t.start()\n"
+        "    t.join()\n"
+        "main()\n",
+        trace_threads=False
+    )
+
+    assert stats is not None
+    assert 'main' in stats.function_stats
+    assert 'work' not in stats.function_stats
+    log.debug("run() thread test passed")
+
+
+def test_runctx_statement():
+    """Test profiling a code string with pyprofiler.runctx()"""
+    from pyprofiler import runctx
+
+    def square(x):
+        return x * x
+
+    stats = runctx("for i in range(5):\n    square(i)\n", {'square': square}, {})
+
+    assert stats is not None
+    assert stats.function_stats['square'].call_count == 5
+    log.debug("runctx() test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    tests = [
+        test_profiler_decorator,
+        test_profiler_context_manager,
+        test_profiler_multiple_calls,
+        test_profiler_stats,
+        test_profiler_std_time,
+        test_profiler_stats_cached,
+        test_profiler_call_tree,
+        test_profiler_flat_stats,
+        test_profiler_wrapper_signatures,
+        test_function_bias,
+        test_run_statement,
+        test_run_uses_profile_hook,
+        test_run_dynamic_functions,
+        test_run_sampling_rate,
+        test_profiler_sampling_rate,
+        test_run_statement_threads,
+        test_runctx_statement,
+    ]
+    for test in tests:
+        test()
+
+    print(f"✅ All {len(tests)} CPU profiler tests passed!")
 
 
 if __name__ == "__main__":
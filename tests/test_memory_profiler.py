@@ -0,0 +1,233 @@
+"""
+Tests for memory profiler
+"""
+import logging
+
+from pyprofiler import MemoryProfiler
+from pyprofiler import memory_profiler
+
+log = logging.getLogger(__name__)
+
+# Keeps allocations alive across profiling sessions
+_retained = []
+
+
+def _allocate(n):
+    """Allocate n small lists from a single source line"""
+    _retained.extend([[i] for i in range(n)])
+
+
+def _profile_growing_sessions(profiler):
+    """Record two sessions whose allocations at one line grow between them"""
+    del _retained[:]
+    for n in (100, 2000):
+        profiler.start()
+        _allocate(n)
+        profiler.stop()
+
+
+def test_snapshots_bounded():
+    """Test that only the last two sessions' snapshots are kept"""
+    profiler = MemoryProfiler()
+    assert profiler.get_stats() == {}
+
+    for _ in range(3):
+        profiler.start()
+        profiler.stop()
+
+    assert len(profiler._snapshots) == 2
+    previous, latest = profiler._snapshots
+    # The previous session only keeps the end snapshot detect_leaks() needs
+    assert previous[0] is None and previous[1] is not None
+    assert latest[0] is not None and latest[1] is not None
+
+    # Cached statistics don't keep dropped snapshots alive
+    import gc
+    import weakref
+    del previous, latest
+    profiler.get_stats()
+    dropped = weakref.ref(profiler._snapshots[0][1])
+    for _ in range(2):
+        profiler.start()
+        profiler.stop()
+        profiler.get_stats()
+    gc.collect()
+    assert dropped() is None
+    log.debug("Snapshot deque test passed")
+
+
+def test_freeze_gc():
+    """Test that freeze_gc freezes the heap only while profiling"""
+    import gc
+
+    # Some interpreters start with objects already frozen; the profiler
+    # then leaves the permanent generation alone
+    frozen = gc.get_freeze_count()
+
+    profiler = MemoryProfiler()
+    profiler.start()
+    assert gc.get_freeze_count() == frozen
+    profiler.stop()
+
+    profiler = MemoryProfiler(freeze_gc=True)
+    profiler.start()
+    try:
+        if frozen:
+            assert gc.get_freeze_count() == frozen
+        else:
+            assert gc.get_freeze_count() > 0
+    finally:
+        profiler.stop()
+    assert gc.get_freeze_count() == frozen
+    log.debug("freeze_gc test passed")
+
+
+def test_memory_growth():
+    """Test that get_stats() reports allocations made while profiling"""
+    profiler = MemoryProfiler()
+
+    del _retained[:]
+    profiler.start()
+    _allocate(5000)
+    profiler.stop()
+
+    try:
+        stats = profiler.get_stats()
+    finally:
+        del _retained[:]
+
+    assert stats['growth'] > 5000 * 8
+    assert stats['final_total'] > stats['initial_total']
+    top = stats['top_stats'][0]
+    assert top.traceback[0].filename == __file__
+    assert top.size_diff > 0
+    assert profiler.get_stats() is stats
+    log.debug("Memory growth test passed")
+
+
+def test_memory_growth_under_pyprofiler_dir():
+    """Test that user code in a directory named pyprofiler is still reported"""
+    import importlib.util
+    import os
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, 'pyprofiler', 'examples', 'user_code.py')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write("def allocate(n, out):\n"
+                    "    out.extend([[i] for i in range(n)])\n")
+        spec = importlib.util.spec_from_file_location('_pyprofiler_dir_user_code', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        retained = []
+        profiler = MemoryProfiler()
+        profiler.start()
+        module.allocate(2000, retained)
+        profiler.stop()
+        stats = profiler.get_stats()
+    finally:
+        shutil.rmtree(root)
+
+    assert stats['growth'] > 2000 * 8
+    assert stats['top_stats'][0].traceback[0].filename == path
+    log.debug("pyprofiler directory growth test passed")
+
+
+def test_detect_leaks():
+    """Test leak detection between two profiling sessions"""
+    profiler = MemoryProfiler()
+    profiler.start()
+    profiler.stop()
+    assert profiler.detect_leaks() == []
+
+    _profile_growing_sessions(profiler)
+    try:
+        leaks = profiler.detect_leaks(threshold=1024)
+        top = profiler.detect_leaks(threshold=1024, top_n=1)
+        none = profiler.detect_leaks(threshold=1 << 40)
+    finally:
+        del _retained[:]
+
+    assert leaks
+    growth = [leak['growth'] for leak in leaks]
+    assert growth == sorted(growth, reverse=True)
+    assert all(g > 1024 for g in growth)
+    assert any(leak['location'].startswith(__file__ + ':') for leak in leaks)
+    assert top == leaks[:1]
+    assert none == []
+    log.debug("Leak detection test passed")
+
+
+def test_detect_leaks_vectorized_matches_dict():
+    """Test that the NumPy/Numba leak join agrees with the dict join"""
+    if memory_profiler.np is None:
+        log.debug("NumPy not installed, leak join equivalence test skipped")
+        return
+
+    profiler = MemoryProfiler()
+    _profile_growing_sessions(profiler)
+
+    try:
+        vectorized = profiler.detect_leaks(threshold=0)
+        np, memory_profiler.np = memory_profiler.np, None
+        try:
+            plain = profiler.detect_leaks(threshold=0)
+        finally:
+            memory_profiler.np = np
+    finally:
+        del _retained[:]
+
+    assert vectorized
+    assert [(leak['location'], leak['growth']) for leak in vectorized] == \
+        [(leak['location'], leak['growth']) for leak in plain]
+    log.debug("Leak join equivalence test passed")
+
+
+def test_leak_kernel():
+    """Test the leak kernel against a dict join on synthetic columns"""
+    np = memory_profiler.np
+    if np is None:
+        log.debug("NumPy not installed, leak kernel test skipped")
+        return
+
+    prev_hashes = np.array([5, -3, 9, 1], dtype=np.int64)
+    prev_sizes = np.array([100, 200, 300, 400], dtype=np.int64)
+    curr_hashes = np.array([9, 7, -3, 5, 1], dtype=np.int64)
+    curr_sizes = np.array([2000, 5000, 150, 1200, 1424], dtype=np.int64)
+
+    indices, growth = memory_profiler._leak_kernel(prev_hashes, prev_sizes,
+                                                   curr_hashes, curr_sizes, 1024)
+
+    prev = dict(zip(prev_hashes.tolist(), prev_sizes.tolist()))
+    expected = [(i, size - prev[h])
+                for i, (h, size) in enumerate(zip(curr_hashes.tolist(), curr_sizes.tolist()))
+                if h in prev and size - prev[h] > 1024]
+    assert [(i, int(growth[i])) for i in indices.tolist()] == expected == [(0, 1700), (3, 1100)]
+    log.debug("Leak kernel test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("Running memory profiler tests...")
+
+    tests = [
+        test_snapshots_bounded,
+        test_freeze_gc,
+        test_memory_growth,
+        test_memory_growth_under_pyprofiler_dir,
+        test_detect_leaks,
+        test_detect_leaks_vectorized_matches_dict,
+        test_leak_kernel,
+    ]
+    for test in tests:
+        test()
+
+    print(f"✅ All {len(tests)} memory profiler tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()